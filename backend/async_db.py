@@ -0,0 +1,119 @@
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, TypeVar
+from fastapi import HTTPException
+from .database import DB_NAME, connect
+from .metrics import Gauge
+
+T = TypeVar("T")
+
+# Reads run on a small set of dedicated reader threads, each with its own
+# read-only connection; all async-path writes go through one writer thread
+# and connection, so they queue in memory instead of contending for the
+# SQLite lock. Neither uses the AnyIO threadpool that sync handlers share.
+READER_THREADS = int(os.environ.get("ALEXIS_DB_READERS", "8"))
+# Requests waiting beyond these limits get an immediate 503.
+READ_QUEUE_LIMIT = int(os.environ.get("ALEXIS_DB_READ_QUEUE", "512"))
+WRITE_QUEUE_LIMIT = int(os.environ.get("ALEXIS_DB_WRITE_QUEUE", "256"))
+
+class AsyncDatabase:
+    def __init__(self, db_name: str = DB_NAME, readers: int = READER_THREADS):
+        self.db_name = db_name
+        self.readers = readers
+        self._local = threading.local()
+        self._conns: List = []
+        self._conns_lock = threading.Lock()
+        self._read_executor: Optional[ThreadPoolExecutor] = None
+        self._write_executor: Optional[ThreadPoolExecutor] = None
+        self._start_lock = threading.Lock()
+        self._pending_reads = 0
+        self._pending_writes = 0
+
+    def start(self):
+        with self._start_lock:
+            if self._read_executor is None:
+                self._read_executor = ThreadPoolExecutor(self.readers, thread_name_prefix="db-reader")
+                self._write_executor = ThreadPoolExecutor(1, thread_name_prefix="db-writer")
+
+    def close(self):
+        with self._start_lock:
+            for executor in (self._read_executor, self._write_executor):
+                if executor is not None:
+                    executor.shutdown(wait=True)
+            self._read_executor = self._write_executor = None
+        with self._conns_lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns.clear()
+        self._local = threading.local()
+
+    def _thread_conn(self, read_only: bool):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = connect(self.db_name)
+            if read_only:
+                conn.execute('PRAGMA query_only=ON')
+            self._local.conn = conn
+            with self._conns_lock:
+                self._conns.append(conn)
+        return conn
+
+    def _run_read(self, fn: Callable, args):
+        conn = self._thread_conn(read_only=True)
+        try:
+            return fn(conn, *args)
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+
+    def _run_write(self, fn: Callable, args):
+        conn = self._thread_conn(read_only=False)
+        try:
+            result = fn(conn, *args)
+            if conn.in_transaction:
+                conn.commit()
+            return result
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+    async def read(self, fn: Callable[..., T], *args) -> T:
+        """Run fn(conn, *args) on a reader thread."""
+        if self._pending_reads >= READ_QUEUE_LIMIT:
+            raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+        self.start()
+        self._pending_reads += 1
+        try:
+            # Carry the request context over so SQL is attributed to the request
+            ctx = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(self._read_executor, ctx.run, self._run_read, fn, args)
+        finally:
+            self._pending_reads -= 1
+
+    async def write(self, fn: Callable[..., T], *args) -> T:
+        """Run fn(conn, *args) on the writer thread, committing if it returns normally."""
+        if self._pending_writes >= WRITE_QUEUE_LIMIT:
+            raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
+        self.start()
+        self._pending_writes += 1
+        try:
+            ctx = contextvars.copy_context()
+            return await asyncio.get_running_loop().run_in_executor(self._write_executor, ctx.run, self._run_write, fn, args)
+        finally:
+            self._pending_writes -= 1
+
+    async def execute(self, sql: str, params=()) -> int:
+        """Run one write statement and commit; returns the cursor's lastrowid."""
+        return await self.write(_execute, sql, params)
+
+def _execute(conn, sql: str, params) -> int:
+    return conn.execute(sql, params).lastrowid
+
+db = AsyncDatabase()
+
+ASYNC_DB_PENDING = Gauge("alexis_async_db_pending", "Async-path database calls queued or running.", ("kind",),
+                         callback=lambda: {("read",): db._pending_reads, ("write",): db._pending_writes})
@@ -1,26 +1,124 @@
 
+import asyncio
+import multiprocessing
+import os
 import secrets
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Tuple
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from .database import get_db
+from .async_db import db
+from .signing_keys import keyring
 
-SECRET_KEY = secrets.token_hex(32) 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Principals are cached briefly per username and invalidated explicitly on
+# user writes; decoded tokens are kept in a bounded LRU until they expire.
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+TOKEN_CACHE_SIZE = 1024
+
+# EventSource cannot send headers, so the admin event stream authenticates
+# with a ?ticket= instead: a JWT that only opens the stream, expires quickly
+# and is accepted once per process. Whatever lands in access logs is useless.
+STREAM_TICKET_SECONDS = 30
+STREAM_TICKET_PURPOSE = "events"
+
+_cache_lock = threading.Lock()
+_principal_cache: Dict[str, Tuple[float, dict]] = {}
+_token_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_used_tickets: Dict[str, float] = {}
+
+# Raising PBKDF2_ROUNDS makes older hashes "need update"; they are rehashed on next login.
+PBKDF2_ROUNDS = int(os.environ.get("ALEXIS_PBKDF2_ROUNDS", "29000"))
+
+# PBKDF2 runs in separate processes so a login burst cannot hold the GIL and
+# starve the request threadpool. Beyond HASH_QUEUE_LIMIT waiting jobs we
+# answer 429 straight away instead of queueing.
+HASH_WORKERS = int(os.environ.get("ALEXIS_HASH_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) // 2)))))
+HASH_QUEUE_LIMIT = int(os.environ.get("ALEXIS_HASH_QUEUE_LIMIT", "16"))
+
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PBKDF2_ROUNDS,
+    pbkdf2_sha256__min_rounds=PBKDF2_ROUNDS,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/login")
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(HASH_WORKERS + HASH_QUEUE_LIMIT)
 
-def get_password_hash(password):
+def _hash_in_worker(password):
     return pwd_context.hash(password)
 
+def _verify_and_update_in_worker(plain_password, hashed_password):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def _get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            # spawn: never fork a process that is already running threads
+            _hash_executor = ProcessPoolExecutor(HASH_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _hash_executor
+
+def start_hash_pool():
+    """Start the hashing workers up front so the first login doesn't pay for it."""
+    executor = _get_hash_executor()
+    for future in [executor.submit(time.sleep, 0) for _ in range(HASH_WORKERS)]:
+        future.result()
+
+def shutdown_hash_pool():
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=True, cancel_futures=True)
+            _hash_executor = None
+
+def _run_hash_job(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication requests, please retry",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return _get_hash_executor().submit(fn, *args).result()
+    finally:
+        _hash_slots.release()
+
+async def _run_hash_job_async(fn, *args):
+    # Same slots as _run_hash_job, but the event loop awaits the worker
+    # instead of parking a threadpool thread on it.
+    if not _hash_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many authentication requests, please retry",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        return await asyncio.wrap_future(_get_hash_executor().submit(fn, *args))
+    finally:
+        _hash_slots.release()
+
+def get_password_hash(password):
+    return _run_hash_job(_hash_in_worker, password)
+
+async def verify_and_update_password_async(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """Returns (valid, new_hash); new_hash is set when the stored hash is outdated."""
+    return await _run_hash_job_async(_verify_and_update_in_worker, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_hash_job_async(_hash_in_worker, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -28,27 +126,104 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    kid, key = keyring.signing_key()
+    encoded_jwt = jwt.encode(to_encode, key, algorithm=ALGORITHM, headers={"kid": kid})
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+def create_stream_ticket(username: str) -> str:
+    expire = datetime.utcnow() + timedelta(seconds=STREAM_TICKET_SECONDS)
+    kid, key = keyring.signing_key()
+    claims = {"sub": username, "exp": expire, "purpose": STREAM_TICKET_PURPOSE, "jti": secrets.token_urlsafe(12)}
+    return jwt.encode(claims, key, algorithm=ALGORITHM, headers={"kid": kid})
+
+def invalidate_principal(username: str):
+    """Drop a cached principal after its users row changes."""
+    with _cache_lock:
+        _principal_cache.pop(username, None)
+
+def _decode_payload(token: str) -> Optional[dict]:
+    try:
+        key = keyring.verification_key(jwt.get_unverified_header(token).get("kid"))
+        if key is None:
+            return None
+        return jwt.decode(token, key, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+
+def _decode_subject(token: str) -> Optional[str]:
+    now = time.time()
+    with _cache_lock:
+        hit = _token_cache.get(token)
+        if hit is not None:
+            if hit[1] > now:
+                _token_cache.move_to_end(token)
+                return hit[0]
+            del _token_cache[token]
+    payload = _decode_payload(token)
+    # Stream tickets are not API tokens
+    if payload is None or payload.get("purpose") is not None:
+        return None
+    username = payload.get("sub")
+    if username is None:
+        return None
+    with _cache_lock:
+        _token_cache[token] = (username, float(payload.get("exp", now)))
+        if len(_token_cache) > TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return username
+
+def _redeem_ticket(ticket: str) -> Optional[str]:
+    payload = _decode_payload(ticket)
+    if payload is None or payload.get("purpose") != STREAM_TICKET_PURPOSE:
+        return None
+    now = time.time()
+    with _cache_lock:
+        for jti in [j for j, exp in _used_tickets.items() if exp <= now]:
+            del _used_tickets[jti]
+        if payload.get("jti") in _used_tickets:
+            return None
+        _used_tickets[payload.get("jti")] = float(payload["exp"])
+    return payload.get("sub")
+
+def _fetch_principal(conn, username: str):
+    return conn.execute('SELECT username FROM users WHERE username=?', (username,)).fetchone()
+
+async def _load_principal(username: str) -> Optional[dict]:
+    now = time.time()
+    hit = _principal_cache.get(username)
+    if hit is not None and hit[0] > now:
+        return hit[1]
+    row = await db.read(_fetch_principal, username)
+    if row is None:
+        return None
+    user = dict(row)
+    with _cache_lock:
+        _principal_cache[username] = (now + PRINCIPAL_CACHE_TTL_SECONDS, user)
+    return user
+
+async def _authenticate(token: Optional[str], ticket: Optional[str] = None) -> dict:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
+    if token:
+        username = _decode_subject(token)
+    else:
+        username = _redeem_ticket(ticket) if ticket else None
+    if username is None:
         raise credentials_exception
-    
-    conn = get_db()
-    user = conn.execute('SELECT * FROM users WHERE username=?', (username,)).fetchone()
-    conn.close()
-    
+
+    user = await _load_principal(username)
     if user is None:
         raise credentials_exception
     return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    return await _authenticate(token)
+
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/login", auto_error=False)
+
+async def get_stream_user(ticket: Optional[str] = None, header_token: Optional[str] = Depends(optional_oauth2_scheme)):
+    """Like get_current_user, but also accepts a one-time ?ticket= (see create_stream_ticket)."""
+    return await _authenticate(header_token, ticket)
@@ -0,0 +1 @@
+"""Load/benchmark tooling: `datagen` builds a large synthetic alexis.db, `harness` drives the API against it."""
@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+# Default scale matches production: ~50k tyres, ~200k bookings.
+DEFAULT_CARS = 2000
+DEFAULT_TYRES = 50000
+DEFAULT_BOOKINGS = 200000
+INSERT_CHUNK = 5000
+
+TYRE_BRANDS = ["Michelin", "Pirelli", "Continental", "Goodyear", "Bridgestone", "Dunlop", "Hankook",
+               "Yokohama", "Falken", "Nexen", "Toyo", "Kumho", "Budget"]
+TYRE_MODELS = ["Pilot Sport 5", "P Zero", "PremiumContact 7", "Eagle F1", "Potenza Sport", "Sport Maxx RT2",
+               "Ventus S1 evo3", "Advan Sport V105", "Azenis FK520", "N'Fera Sport", "Proxes Sport", "Ecsta PS71", "RoadKing"]
+TYRE_CATEGORIES = ["Premium", "Mid-Range", "Budget", "Winter", "All Season"]
+WIDTHS = [175, 185, 195, 205, 215, 225, 235, 245, 255, 265, 275]
+ASPECTS = [30, 35, 40, 45, 50, 55, 60, 65]
+RIMS = [14, 15, 16, 17, 18, 19, 20, 21]
+CAR_MAKES = ["Audi A3", "Audi RS6", "BMW 320d", "BMW M4", "Mercedes C220", "VW Golf GTI", "Ford Focus ST",
+             "Toyota Corolla", "Honda Civic Type R", "Porsche 911", "Tesla Model 3", "Volvo XC60"]
+ENGINES = ["1.0L Turbo", "1.5L", "2.0L Diesel", "2.0L Turbo", "3.0L Twin Turbo", "4.0L V8 Twin Turbo", "Electric"]
+FEATURES = ["Leather", "Pan Roof", "Heated Seats", "Carbon Pack", "Head-up Display", "Adaptive Cruise",
+            "Apple CarPlay", "Ceramic Brakes", "Tow Bar", "360 Camera"]
+BOOKING_STATUSES = ["Pending", "Confirmed", "Completed", "Cancelled"]
+
+def _cars(rng: random.Random, count: int):
+    for _ in range(count):
+        model = rng.choice(CAR_MAKES)
+        yield (model, rng.randint(2008, 2025), rng.choice(ENGINES), rng.randrange(3000, 150000, 250),
+               f"https://picsum.photos/seed/{rng.randrange(10**6)}/800/600", rng.random() < 0.2,
+               rng.randrange(0, 150000, 500), rng.choice(["Automatic", "Manual"]),
+               f"Well maintained {model} with full service history.", json.dumps(rng.sample(FEATURES, rng.randint(1, 4))))
+
+def _tyres(rng: random.Random, count: int):
+    for _ in range(count):
+        width, aspect, rim = rng.choice(WIDTHS), rng.choice(ASPECTS), rng.choice(RIMS)
+        price = round(rng.uniform(45, 320), 2)
+        offer = round(price * rng.uniform(0.8, 0.95), 2) if rng.random() < 0.25 else None
+        specs = {"fuel": rng.choice("ABCDE"), "wet": rng.choice("ABCDE"), "noise": rng.randint(67, 75)}
+        yield (rng.choice(TYRE_BRANDS), rng.choice(TYRE_MODELS), f"{width}/{aspect} R{rim}", price, offer,
+               rng.randint(0, 40), rng.choice(TYRE_CATEGORIES), f"https://picsum.photos/seed/{rng.randrange(10**6)}/300/300",
+               json.dumps(specs), width, aspect, rim)
+
+def _bookings(rng: random.Random, count: int, first_id: int, services, days: int):
+    start = date.today() - timedelta(days=days)
+    for i in range(count):
+        day = start + timedelta(days=rng.randrange(days + 60))
+        stamp = f"{day.isoformat()}T09:00:00Z"
+        status = "Pending" if day >= date.today() else rng.choice(BOOKING_STATUSES)
+        yield (first_id + i, f"Customer {first_id + i}", f"07{rng.randrange(10**9):09d}", rng.choice(services),
+               day.isoformat(), status, None, stamp, stamp, first_id + i)
+
+def _insert(conn, sql: str, rows, label: str):
+    chunk, total, started = [], 0, time.perf_counter()
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= INSERT_CHUNK:
+            conn.executemany(sql, chunk)
+            total, chunk = total + len(chunk), []
+    if chunk:
+        conn.executemany(sql, chunk)
+        total += len(chunk)
+    print(f"  {label}: {total} rows in {time.perf_counter() - started:.1f}s")
+
+def populate(cars: int, tyres: int, bookings: int, days: int, seed: int):
+    """Add synthetic rows to the database in the working directory (migrating it first)."""
+    from ..auth import get_password_hash, shutdown_hash_pool
+    from ..database import connect, init_db
+
+    init_db(get_password_hash)
+    shutdown_hash_pool()
+    rng = random.Random(seed)
+    conn = connect()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        print(f"Generating {cars} cars, {tyres} tyres and {bookings} bookings (seed {seed})...")
+        conn.executemany('INSERT OR IGNORE INTO brands (name) VALUES (?)', [(b,) for b in TYRE_BRANDS])
+        _insert(conn, 'INSERT INTO cars (model, year, engine, price, image, sold, mileage, transmission, description, features) '
+                      'VALUES (?,?,?,?,?,?,?,?,?,?)', _cars(rng, cars), "cars")
+        _insert(conn, 'INSERT INTO tyres (brand, model, size, price, offerPrice, quantity, category, image, specs, width, aspect, rim) '
+                      'VALUES (?,?,?,?,?,?,?,?,?,?,?,?)', _tyres(rng, tyres), "tyres")
+        services = [r['name'] for r in conn.execute('SELECT name FROM services')] or ["Servicing"]
+        # Explicit ids double as change versions, keeping both above existing rows
+        first_id = conn.execute('SELECT MAX(COALESCE(MAX(id), 0), COALESCE(MAX(version), 0)) + 1 FROM bookings').fetchone()[0]
+        _insert(conn, 'INSERT INTO bookings (id, customerName, contact, serviceType, date, status, notes, created_at, updated_at, version) '
+                      'VALUES (?,?,?,?,?,?,?,?,?,?)', _bookings(rng, bookings, first_id, services, days), "bookings")
+        conn.commit()
+        conn.execute('ANALYZE')
+    finally:
+        conn.close()
+    # Rows are written behind the app's back, so run this with the server stopped
+    print("Done.")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Populate alexis.db with a large synthetic dataset")
+    parser.add_argument("--dir", default=".", help="directory holding (or to hold) alexis.db")
+    parser.add_argument("--cars", type=int, default=DEFAULT_CARS)
+    parser.add_argument("--tyres", type=int, default=DEFAULT_TYRES)
+    parser.add_argument("--bookings", type=int, default=DEFAULT_BOOKINGS)
+    parser.add_argument("--days", type=int, default=730, help="spread bookings over this many past days")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    os.chdir(args.dir)
+    populate(args.cars, args.tyres, args.bookings, args.days, args.seed)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,412 @@
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import struct
+import sys
+import time
+import zlib
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+try:
+    import httpx
+except ImportError:  # listed in requirements-dev.txt; only the benchmark needs it
+    httpx = None
+
+DEFAULT_REQUESTS = 300
+DEFAULT_CONCURRENCY = 16
+DEFAULT_WARMUP = 5
+ADMIN_USER, ADMIN_PASSWORD = "admin", "password"
+BENCH_USER = "bench-user"
+SEARCH_QUERIES = ["pirelli 19", "bmw automatic", "205/55R16", "michelin pilot", "winter 17", "golf gti", "continental r18"]
+
+class Context:
+    """State shared by scenarios: auth header, ids discovered up front and ids created along the way."""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+        self.car_ids: List[int] = []
+        self.tyre_ids: List[int] = []
+        self.services: List[str] = []
+        self.brands: List[str] = []
+        self.images: List[str] = []  # digests of uploaded images
+        self.max_booking_id = 1
+        self.created: Dict[str, List] = {"cars": [], "services": [], "tyres": [], "brands": [], "users": []}
+        self.counter = 0
+
+    def next(self) -> int:
+        self.counter += 1
+        return self.counter
+
+    def take(self, kind: str):
+        items = self.created[kind]
+        return items.pop() if items else 0
+
+class Scenario:
+    """One route under test. `path` and `body` may be callables of the Context."""
+
+    def __init__(self, name: str, method: str, path, body=None, auth: bool = False, ok=(200,),
+                 scale: float = 1.0, files=None, stream: bool = False, http_only: bool = False,
+                 on_response: Optional[Callable] = None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+        self.auth = auth
+        self.ok = ok
+        self.scale = scale
+        self.files = files
+        self.stream = stream
+        self.http_only = http_only
+        self.on_response = on_response
+
+    def request(self, ctx: Context) -> dict:
+        resolve = lambda v: v(ctx) if callable(v) else v
+        kwargs = {"method": self.method, "url": resolve(self.path)}
+        if self.auth:
+            kwargs["headers"] = ctx.headers
+        if self.body is not None:
+            kwargs["json"] = resolve(self.body)
+        if self.files is not None:
+            kwargs["files"] = resolve(self.files)
+        return kwargs
+
+# --- Request builders ---
+
+def _future_day(ctx: Context) -> str:
+    # Far enough ahead that capacity rarely runs out during a run
+    return (date(2035, 1, 1) + timedelta(days=ctx.rng.randrange(3650))).isoformat()
+
+def _booking(ctx: Context) -> dict:
+    return {"customerName": "Bench Customer", "contact": "07000000000", "serviceType": ctx.rng.choice(ctx.services),
+            "date": _future_day(ctx), "notes": "benchmark"}
+
+def _availability(ctx: Context) -> str:
+    start = date.today() + timedelta(days=ctx.rng.randrange(60))
+    return f"/api/bookings/availability?from={start.isoformat()}&to={(start + timedelta(days=13)).isoformat()}"
+
+def _car(ctx: Context) -> dict:
+    return {"model": "Bench Car", "year": 2020, "engine": "2.0L", "price": ctx.rng.randrange(5000, 50000), "image": "",
+            "sold": False, "mileage": 10000, "transmission": "Manual", "description": "benchmark", "features": ["Bench"]}
+
+def _tyre(ctx: Context) -> dict:
+    return {"brand": "Bench", "model": "Runner", "size": f"{ctx.rng.choice([195, 205, 225])}/55 R16", "price": 80.0,
+            "offerPrice": None, "quantity": 10, "category": "Budget", "image": "",
+            "specs": {"fuel": "C", "wet": "B", "noise": 70}}
+
+def _import_file(ctx: Context):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["brand", "model", "size", "price", "offerPrice", "quantity", "category", "image", "fuel", "wet", "noise"])
+    batch = ctx.next()
+    for i in range(200):
+        writer.writerow(["BenchImport", f"Model {batch}-{i}", "205/55 R16", "70.00", "", "5", "Budget", "", "C", "B", "70"])
+    return {"file": ("bench.csv", out.getvalue().encode(), "text/csv")}
+
+def _png(width: int, height: int, rgb) -> bytes:
+    """A solid-colour PNG, built without Pillow."""
+    chunk = lambda tag, data: struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+    rows = b"".join(b"\x00" + bytes(rgb) * width for _ in range(height))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)) +
+            chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b""))
+
+def _image_file(ctx: Context):
+    # A new colour each time, so every upload is stored and resized rather than deduplicated
+    n = ctx.next()
+    return {"file": ("bench.png", _png(800, 600, (n % 256, n // 256 % 256, n // 65536 % 256)), "image/png")}
+
+def _remember_image(ctx: Context, response):
+    ctx.images.append(response.json()["key"][len("img:"):])
+
+def _remember_user(ctx: Context, response):
+    ctx.created["users"].append(json.loads(response.request.content)["username"])
+
+def _remember(kind: str):
+    def on_response(ctx: Context, response):
+        ctx.created[kind].append(response.json()["id"] if kind != "brands" else response.json()["name"])
+    return on_response
+
+def build_scenarios() -> List[Scenario]:
+    rnd = lambda choices: (lambda ctx: ctx.rng.choice(choices(ctx)))
+    return [
+        # --- routers/public.py ---
+        Scenario("cars", "GET", "/api/cars"),
+        Scenario("cars_page", "GET", lambda ctx: f"/api/cars?sort=price_asc&min_price={ctx.rng.randrange(0, 100000, 5000)}&limit=24"),
+        Scenario("services", "GET", "/api/services"),
+        Scenario("tyres", "GET", "/api/tyres", scale=0.1),
+        Scenario("tyres_page", "GET", lambda ctx: f"/api/tyres?brand={ctx.rng.choice(ctx.brands)}&in_stock=true&sort=price_asc&limit=24"),
+        Scenario("tyres_fitment", "GET", lambda ctx: f"/api/tyres/fitment?size={ctx.rng.choice([195, 205, 225, 245])}/"
+                                                     f"{ctx.rng.choice([40, 45, 55])}R{ctx.rng.choice([16, 17, 18, 19])}"),
+        Scenario("search", "GET", lambda ctx: f"/api/search?q={ctx.rng.choice(SEARCH_QUERIES)}"),
+        Scenario("brands", "GET", "/api/brands"),
+        Scenario("settings", "GET", "/api/settings/companyInfo"),
+        Scenario("bootstrap", "GET", "/api/bootstrap", scale=0.1),
+        Scenario("bookings_availability", "GET", _availability),
+        Scenario("bookings_create", "POST", "/api/bookings", body=_booking, ok=(200, 409)),
+        # The variant a listing card asks for; the original stands in until it is generated
+        Scenario("images_get", "GET", lambda ctx: f"/api/images/{ctx.rng.choice(ctx.images)}/640.webp"),
+        # --- routers/admin.py ---
+        Scenario("login", "POST", "/api/login", body={"username": ADMIN_USER, "password": ADMIN_PASSWORD}, scale=0.05, ok=(200, 429)),
+        Scenario("admin_bookings", "GET", "/api/bookings", auth=True, scale=0.02),
+        Scenario("admin_bookings_page", "GET", "/api/bookings?status=Pending&sort=date_desc&limit=100", auth=True),
+        Scenario("admin_bookings_since", "GET", lambda ctx: f"/api/bookings?since={max(0, ctx.max_booking_id - 500)}&limit=500", auth=True),
+        Scenario("booking_status", "PUT", lambda ctx: f"/api/bookings/{ctx.rng.randint(1, ctx.max_booking_id)}/status",
+                 body=lambda ctx: {"status": ctx.rng.choice(["Pending", "Confirmed", "Completed"])}, auth=True),
+        Scenario("users_add", "POST", "/api/users", body=lambda ctx: {"username": f"bench-{time.time_ns()}", "password": "bench"},
+                 auth=True, scale=0.05, ok=(200, 429), on_response=_remember_user),
+        Scenario("users_password", "PUT", f"/api/users/{BENCH_USER}/password", body={"password": "bench"}, auth=True,
+                 scale=0.05, ok=(200, 429)),
+        Scenario("users_delete", "DELETE", lambda ctx: f"/api/users/{ctx.take('users') or 'bench-missing'}", auth=True, scale=0.02),
+        Scenario("cars_create", "POST", "/api/cars", body=_car, auth=True, on_response=_remember("cars")),
+        Scenario("cars_update", "PUT", lambda ctx: f"/api/cars/{ctx.rng.choice(ctx.created['cars'] or [0])}", body=_car, auth=True),
+        Scenario("cars_patch", "PATCH", lambda ctx: f"/api/cars/{ctx.rng.choice(ctx.created['cars'] or [0])}",
+                 body=lambda ctx: {"price": ctx.rng.randrange(5000, 50000)}, auth=True),
+        Scenario("cars_bulk_edit", "POST", "/api/cars/bulk-edit", auth=True, scale=0.1,
+                 body=lambda ctx: {"filter": {"ids": ctx.created["cars"][-50:] or [0]}, "priceChangePercent": -5}),
+        Scenario("cars_delete", "DELETE", lambda ctx: f"/api/cars/{ctx.take('cars')}", auth=True),
+        Scenario("services_create", "POST", "/api/services", body={"name": "Bench Service", "description": "benchmark"},
+                 auth=True, on_response=_remember("services")),
+        Scenario("services_update", "PUT", lambda ctx: f"/api/services/{ctx.rng.choice(ctx.created['services'] or [0])}",
+                 body={"name": "Bench Service", "description": "updated"}, auth=True),
+        Scenario("services_patch", "PATCH", lambda ctx: f"/api/services/{ctx.rng.choice(ctx.created['services'] or [0])}",
+                 body={"description": "patched"}, auth=True),
+        Scenario("services_bulk_edit", "POST", "/api/services/bulk-edit", auth=True, scale=0.1,
+                 body=lambda ctx: {"filter": {"ids": ctx.created["services"][-50:] or [0]}, "changes": {"description": "bulk"}}),
+        Scenario("services_delete", "DELETE", lambda ctx: f"/api/services/{ctx.take('services')}", auth=True),
+        Scenario("tyres_create", "POST", "/api/tyres", body=_tyre, auth=True, on_response=_remember("tyres")),
+        Scenario("tyres_update", "PUT", lambda ctx: f"/api/tyres/{ctx.rng.choice(ctx.created['tyres'] or [0])}", body=_tyre, auth=True),
+        Scenario("tyres_patch", "PATCH", lambda ctx: f"/api/tyres/{ctx.rng.choice(ctx.created['tyres'] or [0])}",
+                 body=lambda ctx: {"offerPrice": ctx.rng.choice([None, 72.5])}, auth=True),
+        # A brand-and-rim promotion across the seeded catalogue
+        Scenario("tyres_bulk_edit", "POST", "/api/tyres/bulk-edit", auth=True, scale=0.1,
+                 body=lambda ctx: {"filter": {"brand": ctx.rng.choice(ctx.brands), "rim": ctx.rng.choice([16, 17, 18, 19])},
+                                   "offerPercentOff": ctx.rng.choice([5, 10, 15])}),
+        Scenario("tyres_delete", "DELETE", lambda ctx: f"/api/tyres/{ctx.take('tyres')}", auth=True),
+        Scenario("tyre_stock", "PUT", lambda ctx: f"/api/tyres/{ctx.rng.choice(ctx.tyre_ids)}/stock",
+                 body=lambda ctx: {"delta": ctx.rng.choice([-1, 1])}, auth=True),
+        Scenario("tyre_stock_batch", "POST", "/api/tyres/stock/batch", auth=True,
+                 body=lambda ctx: {"adjustments": [{"id": ctx.rng.choice(ctx.tyre_ids), "delta": ctx.rng.choice([-1, 1])}
+                                                   for _ in range(20)]}),
+        Scenario("tyres_import", "POST", "/api/tyres/import?format=csv", files=_import_file, auth=True, scale=0.05),
+        Scenario("tyres_export", "GET", "/api/tyres/export?format=ndjson", auth=True, scale=0.02),
+        Scenario("images_upload", "POST", "/api/images", files=_image_file, auth=True, scale=0.1, on_response=_remember_image),
+        Scenario("brands_add", "POST", "/api/brands", body=lambda ctx: {"name": f"Bench Brand {ctx.next()}"}, auth=True,
+                 on_response=_remember("brands")),
+        Scenario("brands_delete", "DELETE", lambda ctx: f"/api/brands/{ctx.take('brands')}", auth=True),
+        Scenario("settings_update", "POST", "/api/settings", body=lambda ctx: {"key": "benchSetting", "value": {"n": ctx.next()}}, auth=True),
+        Scenario("admin_stats", "GET", "/api/admin/stats", auth=True),
+        Scenario("admin_events_ticket", "POST", "/api/admin/events/ticket", body={}, auth=True),
+        # Time to the first frame of the change feed
+        Scenario("admin_events", "GET", "/api/admin/events", auth=True, scale=0.05, stream=True, http_only=True),
+    ]
+
+# --- Running ---
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+async def _send(client, scenario: Scenario, ctx: Context):
+    kwargs = scenario.request(ctx)
+    if scenario.stream:
+        async with client.stream(**kwargs) as response:
+            async for _ in response.aiter_raw():
+                break
+        return response
+    return await client.request(**kwargs)
+
+async def run_scenario(client, scenario: Scenario, ctx: Context, count: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        response = await _send(client, scenario, ctx)
+        if scenario.on_response and response.status_code == 200:
+            scenario.on_response(ctx, response)
+
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+    remaining = count
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await _send(client, scenario, ctx)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+            if response.status_code not in scenario.ok:
+                errors += 1
+            elif scenario.on_response and response.status_code == 200:
+                scenario.on_response(ctx, response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(max(1, min(concurrency, count)))])
+    wall = time.perf_counter() - started
+    latencies.sort()
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "method": scenario.method,
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "mean_ms": ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+        "max_ms": ms(latencies[-1]) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+    }
+
+async def prepare(client, ctx: Context):
+    response = await client.post("/api/login", json={"username": ADMIN_USER, "password": ADMIN_PASSWORD})
+    response.raise_for_status()
+    ctx.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    await client.post("/api/users", json={"username": BENCH_USER, "password": "bench"}, headers=ctx.headers)
+    ctx.car_ids = [c["id"] for c in (await client.get("/api/cars?limit=100")).json()["items"]]
+    ctx.tyre_ids = [t["id"] for t in (await client.get("/api/tyres?limit=100")).json()["items"]]
+    ctx.services = [s["name"] for s in (await client.get("/api/services")).json()] or ["Servicing"]
+    ctx.brands = [b["name"] for b in (await client.get("/api/brands")).json()] or ["Michelin"]
+    upload = await client.post("/api/images", files=_image_file(ctx), headers=ctx.headers)
+    upload.raise_for_status()
+    _remember_image(ctx, upload)
+    newest = (await client.get("/api/bookings?limit=1", headers=ctx.headers)).json()["items"]
+    ctx.max_booking_id = newest[0]["id"] if newest else 1
+
+async def teardown(client, ctx: Context):
+    """Remove the user accounts the run created."""
+    for username in ctx.created["users"] + [BENCH_USER]:
+        await client.delete(f"/api/users/{username}", headers=ctx.headers)
+    ctx.created["users"] = []
+
+async def run_all(client, scenarios: List[Scenario], args) -> Dict[str, dict]:
+    ctx = Context(random.Random(args.seed))
+    await prepare(client, ctx)
+    results = {}
+    try:
+        for scenario in scenarios:
+            count = max(1, int(args.requests * scenario.scale))
+            r = results[scenario.name] = await run_scenario(client, scenario, ctx, count, args.concurrency, min(args.warmup, count))
+            print(f"{scenario.name:<24} {r['requests']:>6} {r['errors']:>5} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+                  f"{r['p99_ms']:>9.2f} {r['throughput_rps']:>9.1f}")
+    finally:
+        await teardown(client, ctx)
+    return results
+
+async def run_in_process(scenarios: List[Scenario], args) -> Dict[str, dict]:
+    from ..main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            return await run_all(client, scenarios, args)
+
+async def run_http(scenarios: List[Scenario], args) -> Dict[str, dict]:
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout, limits=limits) as client:
+        return await run_all(client, scenarios, args)
+
+def dataset_counts() -> Optional[Dict[str, int]]:
+    if not os.path.exists("alexis.db"):
+        return None
+    conn = sqlite3.connect("alexis.db")
+    try:
+        return {table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0] for table in ("cars", "tyres", "bookings")}
+    finally:
+        conn.close()
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(previous_path: str, results: Dict[str, dict]):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nCompared with {previous_path} ({previous['meta'].get('commit')}):")
+    print(f"{'route':<24} {'p95 before':>10} {'p95 now':>10} {'change':>8}")
+    for name, now in results.items():
+        before = previous["routes"].get(name)
+        if not before or not before["p95_ms"]:
+            continue
+        change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        print(f"{name:<24} {before['p95_ms']:>10.2f} {now['p95_ms']:>10.2f} {change:>+7.1f}%")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every API route and write the latency percentiles as JSON")
+    parser.add_argument("--target", default="inproc", help="'inproc' to run the app in this process, or a base URL such as http://127.0.0.1:8000")
+    parser.add_argument("--dir", default=".", help="directory holding alexis.db (in-process target)")
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="requests per route; heavy routes run a fraction")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="unrecorded requests per route")
+    parser.add_argument("--only", default="", help="comma-separated route names to run")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--out", help="result file (default bench_results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier result file to compare p95 latency against")
+    args = parser.parse_args(argv)
+
+    if httpx is None:
+        print("The benchmark needs httpx: pip install -r backend/requirements-dev.txt")
+        return 2
+
+    out = os.path.abspath(args.out) if args.out else None
+    previous = os.path.abspath(args.compare) if args.compare else None
+    commit = git_commit()
+    in_process = args.target == "inproc"
+    scenarios = [s for s in build_scenarios() if not (in_process and s.http_only)]
+    if args.only:
+        wanted = set(args.only.split(","))
+        scenarios = [s for s in scenarios if s.name in wanted]
+
+    if in_process:
+        os.chdir(args.dir)
+    counts = dataset_counts() if in_process else None
+    print(f"{'route':<24} {'n':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+    started = datetime.utcnow()
+    runner = run_in_process if in_process else run_http
+    results = asyncio.run(runner(scenarios, args))
+
+    report = {
+        "meta": {
+            "started_at": started.isoformat(timespec="seconds") + "Z",
+            "commit": commit,
+            "target": args.target,
+            "concurrency": args.concurrency,
+            "requests_per_route": args.requests,
+            "seed": args.seed,
+            "dataset": counts,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "routes": results,
+    }
+    if out is None:
+        os.makedirs("bench_results", exist_ok=True)
+        out = os.path.abspath(os.path.join("bench_results", f"{started.strftime('%Y%m%dT%H%M%S')}-{commit or 'local'}.json"))
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {out}")
+    if previous:
+        compare(previous, results)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import asyncio
+import os
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional, Union
+from fastapi import HTTPException
+from .async_db import db
+from .bookings import NEXT_VERSION_SQL, check_capacity, remaining_capacity
+from .events import event_bus
+from .schemas import Booking
+
+# Window (ms) for group-committing public booking submissions; 0 keeps one transaction per booking.
+BOOKING_GROUP_COMMIT_MS = int(os.environ.get("ALEXIS_BOOKING_GROUP_COMMIT_MS", "0"))
+# "commit": answer once the group holding the booking has committed (durable).
+# "queue": answer as soon as the booking is validated, numbered and queued.
+BOOKING_ACK = os.environ.get("ALEXIS_BOOKING_ACK", "commit")
+GROUP_MAX_SIZE = 256
+# Booking ids are reserved in blocks so a queued booking can be numbered
+# without a write of its own.
+ID_BLOCK_SIZE = 64
+
+def _reserve_ids(conn, count: int) -> int:
+    """Reserve `count` booking ids for this process and return the first.
+
+    Bumping sqlite_sequence keeps AUTOINCREMENT inserts (from the direct
+    path or other workers) clear of the reserved block.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name='bookings'").fetchone()
+    top = max(row['seq'] if row else 0, conn.execute('SELECT COALESCE(MAX(id), 0) FROM bookings').fetchone()[0])
+    if row:
+        conn.execute("UPDATE sqlite_sequence SET seq=? WHERE name='bookings'", (top + count,))
+    else:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('bookings', ?)", (top + count,))
+    return top + 1
+
+def _write_group(conn, bookings: List[Booking], enforce_capacity: bool) -> List[Optional[int]]:
+    """Insert a group of bookings in one transaction; returns each one's version, or None if its slot filled up."""
+    conn.execute('BEGIN IMMEDIATE')
+    versions: List[Optional[int]] = []
+    for b in bookings:
+        remaining = remaining_capacity(conn, b.date, b.serviceType)
+        if remaining is None or remaining <= 0:
+            if enforce_capacity:
+                versions.append(None)
+                continue
+            # Already acknowledged to the customer, so keep it for the admins to resolve
+            print(f"Booking {b.id} overbooks {b.date} {b.serviceType}")
+        conn.execute(
+            'INSERT INTO bookings (id, customerName, contact, serviceType, date, status, notes, created_at, updated_at, version) '
+            f'VALUES (?,?,?,?,?,?,?,?,?,{NEXT_VERSION_SQL})',
+            (b.id, b.customerName, b.contact, b.serviceType, b.date, b.status, b.notes, b.created_at, b.updated_at)
+        )
+        versions.append(conn.execute('SELECT version FROM bookings WHERE id=?', (b.id,)).fetchone()[0])
+    return versions
+
+class _QueuedBooking:
+    def __init__(self, booking: Booking, future: Optional[asyncio.Future]):
+        self.booking = booking
+        self.future = future
+
+class BookingWriteBehind:
+    """Queues public bookings and writes them in group-committed transactions.
+
+    Capacity is checked against the database plus everything still queued
+    before a booking is accepted, and again inside the group transaction.
+    With ack="commit" a booking that lost that race gets the usual 409;
+    with ack="queue" the customer already has an answer, so it is kept.
+    """
+
+    def __init__(self, window_ms: int, ack: str = "commit"):
+        if ack not in ("commit", "queue"):
+            raise ValueError(f"Unknown booking ack mode '{ack}'")
+        self.window = window_ms / 1000.0
+        self.ack = ack
+        self._queue: List[_QueuedBooking] = []
+        self._inflight: List[_QueuedBooking] = []
+        self._ids: Deque[int] = deque()
+        self._admit_lock: Optional[asyncio.Lock] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def start(self):
+        self._closing = False
+        self._admit_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def drain(self):
+        """Stop taking bookings and wait until everything queued has been written."""
+        self._closing = True
+        if self._task is not None:
+            self._wakeup.set()
+            await self._task
+            self._task = None
+
+    def _pending(self, slot: str, service: str) -> int:
+        return sum(1 for item in self._queue + self._inflight
+                   if item.booking.date == slot and item.booking.serviceType == service)
+
+    async def _next_id(self) -> int:
+        if not self._ids:
+            first = await db.write(_reserve_ids, ID_BLOCK_SIZE)
+            self._ids.extend(range(first, first + ID_BLOCK_SIZE))
+        return self._ids.popleft()
+
+    async def submit(self, booking: Booking) -> Booking:
+        if self._closing or self._task is None:
+            raise HTTPException(status_code=503, detail="Bookings are paused, please retry", headers={"Retry-After": "1"})
+        async with self._admit_lock:
+            # Count the queue before reading: a group committing mid-read is
+            # then counted twice at worst, never missed.
+            pending = self._pending(booking.date, booking.serviceType)
+            remaining = await db.read(remaining_capacity, booking.date, booking.serviceType)
+            check_capacity(remaining if remaining is None else remaining - pending)
+
+            booking.id = await self._next_id()
+            booking.created_at = booking.updated_at = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+            future = asyncio.get_running_loop().create_future() if self.ack == "commit" else None
+            self._queue.append(_QueuedBooking(booking, future))
+            self._wakeup.set()
+        if future is not None:
+            booking.version = await future
+        return booking
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            if not self._closing:
+                # Give the group a moment to fill before committing it
+                await asyncio.sleep(self.window)
+            self._wakeup.clear()
+            await self.flush()
+            if self._closing and not self._queue:
+                return
+
+    async def _write(self, items: List[_QueuedBooking]) -> List[Union[int, None, Exception]]:
+        return await db.write(_write_group, [item.booking for item in items], self.ack == "commit")
+
+    async def flush(self):
+        items, self._queue = self._queue[:GROUP_MAX_SIZE], self._queue[GROUP_MAX_SIZE:]
+        if self._queue:
+            self._wakeup.set()
+        if not items:
+            return
+        self._inflight = items
+        try:
+            try:
+                outcomes = await self._write(items)
+            except Exception as e:
+                # Retry one by one so a single bad row cannot sink the whole group
+                print(f"Error group-committing {len(items)} bookings: {e}")
+                outcomes = []
+                for item in items:
+                    try:
+                        outcomes += await self._write([item])
+                    except Exception as item_error:
+                        print(f"Error writing booking {item.booking.id}: {item_error}")
+                        outcomes.append(item_error)
+        finally:
+            self._inflight = []
+
+        for item, outcome in zip(items, outcomes):
+            done = item.future is None or item.future.done()
+            if isinstance(outcome, int):
+                item.booking.version = outcome
+                event_bus.publish("booking.created", item.booking.dict())
+                if not done:
+                    item.future.set_result(outcome)
+            elif not done:
+                item.future.set_exception(outcome or HTTPException(status_code=409, detail="That slot is fully booked"))
+
+booking_queue: Optional[BookingWriteBehind] = (
+    BookingWriteBehind(BOOKING_GROUP_COMMIT_MS, BOOKING_ACK) if BOOKING_GROUP_COMMIT_MS > 0 else None
+)
@@ -0,0 +1,116 @@
+import json
+import math
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+
+# settings key holding the capacity config, e.g.
+# {"defaultPerSlot": 8, "services": {"Servicing": 4}, "slotTimes": ["09:00", "13:00"]}
+# With no slotTimes each day is one slot and bookings carry a date only.
+# Without a defaultPerSlot, services not listed take unlimited bookings (the
+# behaviour before capacity existed), so nothing changes until a cap is set.
+# bookings.date holds the normalized slot key, so the (date, serviceType,
+# status) index serves both range scans and per-slot counts.
+CAPACITY_SETTING = "bookingCapacity"
+DEFAULT_CAPACITY = {"defaultPerSlot": None, "services": {}, "slotTimes": []}
+# Statuses that no longer hold a slot
+RELEASED_STATUSES = ("Cancelled",)
+MAX_AVAILABILITY_DAYS = 62
+
+# Every booking write takes the next change version; writes are serialized by
+# SQLite's write lock, so versions are unique and increasing.
+NEXT_VERSION_SQL = '(SELECT COALESCE(MAX(version), 0) + 1 FROM bookings)'
+NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%SZ', 'now')"
+
+_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y")
+_DATETIME_FORMATS = ("%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%d/%m/%Y %H:%M")
+
+def normalize_slot(value: str) -> Optional[str]:
+    """Return 'YYYY-MM-DD' or 'YYYY-MM-DDTHH:MM' for a booking date, or None if unparseable."""
+    value = (value or "").strip()
+    for fmt in _DATETIME_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%dT%H:%M")
+        except ValueError:
+            pass
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            pass
+    return None
+
+def load_capacity(conn) -> dict:
+    row = conn.execute('SELECT value FROM settings WHERE key=?', (CAPACITY_SETTING,)).fetchone()
+    config = dict(DEFAULT_CAPACITY)
+    if row:
+        config.update(json.loads(row['value']))
+    return config
+
+def capacity_for(config: dict, service: str) -> Optional[int]:
+    """Places per slot for a service; None when uncapped."""
+    capacity = config.get("services", {}).get(service, config.get("defaultPerSlot"))
+    return None if capacity is None else int(capacity)
+
+def slot_keys(config: dict, day: date) -> List[str]:
+    times = config.get("slotTimes") or []
+    if not times:
+        return [day.isoformat()]
+    return [f"{day.isoformat()}T{t}" for t in times]
+
+def is_valid_slot(config: dict, slot: str) -> bool:
+    times = config.get("slotTimes") or []
+    if not times:
+        return "T" not in slot
+    return "T" in slot and slot.split("T", 1)[1] in times
+
+def slot_range(day_from: date, day_to: date):
+    """Half-open [start, end) bounds that cover both date and datetime slot keys."""
+    return day_from.isoformat(), (day_to + timedelta(days=1)).isoformat()
+
+def booked_counts(conn, start: str, end: str, service: Optional[str] = None) -> Dict[tuple, int]:
+    placeholders = ','.join('?' * len(RELEASED_STATUSES))
+    sql = ('SELECT date, serviceType, count(*) AS n FROM bookings '
+           f'WHERE date >= ? AND date < ? AND status NOT IN ({placeholders})')
+    params = [start, end, *RELEASED_STATUSES]
+    if service:
+        sql += ' AND serviceType = ?'
+        params.append(service)
+    sql += ' GROUP BY date, serviceType'
+    return {(r['date'], r['serviceType']): r['n'] for r in conn.execute(sql, params)}
+
+def count_slot(conn, slot: str, service: str) -> int:
+    placeholders = ','.join('?' * len(RELEASED_STATUSES))
+    return conn.execute(
+        f'SELECT count(*) FROM bookings WHERE date=? AND serviceType=? AND status NOT IN ({placeholders})',
+        (slot, service, *RELEASED_STATUSES)
+    ).fetchone()[0]
+
+def remaining_capacity(conn, slot: str, service: str) -> Optional[float]:
+    """Free places left in a slot for a service (math.inf if uncapped), or None if the slot is not bookable."""
+    config = load_capacity(conn)
+    if not is_valid_slot(config, slot):
+        return None
+    capacity = capacity_for(config, service)
+    if capacity is None:
+        return math.inf
+    return capacity - count_slot(conn, slot, service)
+
+def check_capacity(remaining: Optional[int]):
+    """Raise the public-facing error for a slot that cannot take another booking."""
+    if remaining is None:
+        raise HTTPException(status_code=400, detail="Please choose one of the available time slots")
+    if remaining <= 0:
+        raise HTTPException(status_code=409, detail="That slot is fully booked")
+
+def backfill_booking_dates(c):
+    """Rewrite legacy free-text booking dates into normalized slot keys where possible."""
+    updates = []
+    rows = c.execute("SELECT id, date FROM bookings WHERE date NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'").fetchall()
+    for row in rows:
+        slot = normalize_slot(row[1])
+        if slot and slot != row[1]:
+            updates.append((slot, row[0]))
+    if updates:
+        print(f"Normalizing {len(updates)} booking dates...")
+        c.executemany('UPDATE bookings SET date=? WHERE id=?', updates)
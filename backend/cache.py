@@ -0,0 +1,115 @@
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+from .async_db import db
+
+class CachedBody:
+    """A serialized response body plus its validators and compressed variants."""
+
+    __slots__ = ("body", "etag", "last_modified", "_encoded")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.last_modified = time.time()
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str, compress: Callable[[bytes, str], bytes]) -> bytes:
+        # Compressed once per version; a racing duplicate compress is harmless.
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress(self.body, encoding)
+        return data
+
+def _read_shared_versions(conn):
+    return [tuple(r) for r in conn.execute('SELECT key, version FROM cache_versions')]
+
+class VersionedCache:
+    """Serialized response bodies keyed by catalogue name.
+
+    Writers call bump() after committing; the next read for that key
+    rebuilds the body once and every read after that is a dict lookup.
+    Every write also increments cache_versions through triggers, in the
+    same transaction (see migrations.py); with several worker processes,
+    the sync_shared_versions() task polls that table for sibling writes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._entries: Dict[str, Tuple[int, CachedBody]] = {}
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._sync_interval: Optional[float] = None
+        self._shared_seen: Optional[Dict[str, int]] = None
+
+    def enable_shared_versions(self, sync_interval: float = 1.0):
+        self._sync_interval = sync_interval
+
+    def _apply_shared(self, rows):
+        with self._lock:
+            first_sync = self._shared_seen is None
+            seen = self._shared_seen or {}
+            for key, version in rows:
+                if seen.get(key) != version:
+                    seen[key] = version
+                    if not first_sync:
+                        self._versions[key] = self._versions.get(key, 0) + 1
+                        self._entries.pop(key, None)
+            self._shared_seen = seen
+
+    async def sync_shared_versions(self):
+        """Poll cache_versions for sibling writes; run as a task while shared versions are enabled.
+
+        The read goes through the async reader pool, so reads served from
+        the cache never wait on SQLite.
+        """
+        while self._sync_interval is not None:
+            try:
+                self._apply_shared(await db.read(_read_shared_versions))
+            except Exception as e:
+                print(f"Cache version sync failed: {e}")
+            await asyncio.sleep(self._sync_interval)
+
+    def version(self, key: str) -> int:
+        return self._versions.get(key, 0)
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == self.version(key):
+            return entry[1]
+        return None
+
+    def get_or_build(self, key: str, build: Callable[[], bytes]) -> CachedBody:
+        body = self.get(key)
+        if body is not None:
+            return body
+        with self._lock:
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        # Only one thread rebuilds a given key; the rest wait and reuse it.
+        with build_lock:
+            body = self.get(key)
+            if body is not None:
+                return body
+            version = self.version(key)
+            body = CachedBody(build())
+            with self._lock:
+                # A write that landed mid-build leaves this entry stale.
+                if self.version(key) == version:
+                    self._entries[key] = (version, body)
+            return body
+
+    def bump(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._versions[key] = self._versions.get(key, 0) + 1
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._versions):
+                self._versions[key] += 1
+            self._entries.clear()
+
+catalogue_cache = VersionedCache()
@@ -1,15 +1,141 @@
 
+import os
+import queue
 import sqlite3
+import threading
 import json
+from contextlib import contextmanager
+from fastapi import HTTPException
 from .schemas import TyreSpecs
+from .tyresize import size_parts
+from .metrics import Counter, Gauge, TracedConnection
+from .migrations import LATEST_VERSION, current_version, migrate
 
 DB_NAME = "alexis.db"
 
-def get_db():
-    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+# AnyIO's default threadpool has 40 workers, so one connection per worker
+# means a sync handler never waits on the pool.
+POOL_SIZE = int(os.environ.get("ALEXIS_DB_POOL_SIZE", "40"))
+POOL_TIMEOUT = float(os.environ.get("ALEXIS_DB_POOL_TIMEOUT", "10"))
+
+# Per-connection tuning. WAL lets readers run alongside the booking/stock
+# writers; NORMAL sync is durable across app crashes and only risks the last
+# transactions on power loss.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-8000",
+)
+
+def connect(db_name: str = DB_NAME):
+    """Open a standalone, tuned connection. Request handlers should use get_db()."""
+    conn = sqlite3.connect(db_name, check_same_thread=False, factory=TracedConnection)
     conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
 
+class ConnectionPool:
+    """Fixed-size pool of long-lived connections, opened lazily on demand."""
+
+    def __init__(self, db_name: str = DB_NAME, size: int = POOL_SIZE):
+        self.db_name = db_name
+        self.size = size
+        # LIFO keeps the most recently used (warmest) connections in play.
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+
+    def acquire(self, timeout: float = POOL_TIMEOUT):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return connect(self.db_name)
+                except Exception:
+                    self._opened -= 1
+                    raise
+        POOL_WAITS.inc()
+        return self._idle.get(timeout=timeout)
+
+    def release(self, conn):
+        if self._closed:
+            conn.close()
+            return
+        if conn.in_transaction:
+            # A handler failed mid-write; never hand out a dirty connection.
+            conn.rollback()
+        self._idle.put(conn)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+_pool: ConnectionPool = None
+_pool_lock = threading.Lock()
+
+def _pool_gauge():
+    pool = _pool
+    if pool is None:
+        return {}
+    idle = pool._idle.qsize()
+    return {("open",): pool._opened, ("idle",): idle, ("in_use",): pool._opened - idle}
+
+POOL_CONNECTIONS = Gauge("alexis_db_pool_connections", "Pooled SQLite connections by state.", ("state",), callback=_pool_gauge)
+POOL_WAITS = Counter("alexis_db_pool_waits_total", "Pool acquires that had to wait for a connection.")
+POOL_TIMEOUTS = Counter("alexis_db_pool_timeouts_total", "Pool acquires that gave up and answered 503.")
+
+def init_pool(size: int = POOL_SIZE, db_name: str = DB_NAME):
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = ConnectionPool(db_name, size)
+    return _pool
+
+def get_pool():
+    if _pool is None:
+        return init_pool()
+    return _pool
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+@contextmanager
+def pooled_connection():
+    """Borrow a pooled connection outside of a request dependency."""
+    pool = get_pool()
+    try:
+        conn = pool.acquire()
+    except queue.Empty:
+        POOL_TIMEOUTS.inc()
+        raise HTTPException(status_code=503, detail="Database busy, please retry")
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+def get_db():
+    """FastAPI dependency yielding a pooled connection for the request."""
+    with pooled_connection() as conn:
+        yield conn
+
 def internal_seed_data(conn):
     """Internal function to populate DB on first run only."""
     c = conn.cursor()
@@ -44,43 +170,27 @@ def internal_seed_data(conn):
         ("Pirelli", "P Zero", "255/35 R19", 180.00, 165.00, 8, "Premium", "https://picsum.photos/seed/pirelli/300/300", json.dumps({"fuel": "D", "wet": "A", "noise": 71})),
         ("Budget", "RoadKing", "205/55 R16", 55.00, None, 20, "Budget", "https://picsum.photos/seed/budget/300/300", json.dumps({"fuel": "E", "wet": "C", "noise": 74}))
     ]
-    c.executemany('INSERT INTO tyres (brand, model, size, price, offerPrice, quantity, category, image, specs) VALUES (?,?,?,?,?,?,?,?,?)', tyres_seed)
+    c.executemany(
+        'INSERT INTO tyres (brand, model, size, price, offerPrice, quantity, category, image, specs, width, aspect, rim) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)',
+        [(*t, *size_parts(t[2])) for t in tyres_seed]
+    )
     
     print("Database seeded successfully.")
 
 def init_db(get_password_hash_func):
-    print("Initializing Database...")
     try:
-        conn = get_db()
+        conn = connect()
+        # Fast path: an up-to-date database costs one version lookup
+        if current_version(conn) >= LATEST_VERSION:
+            conn.close()
+            print(f"Database schema is up to date (version {LATEST_VERSION}).")
+            return
+        print("Initializing Database...")
         c = conn.cursor()
-        
-        c.execute('''CREATE TABLE IF NOT EXISTS cars (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            model TEXT, year INTEGER, engine TEXT, price REAL, image TEXT, 
-            sold BOOLEAN, mileage INTEGER, transmission TEXT, description TEXT, features TEXT
-        )''')
-        c.execute('''CREATE TABLE IF NOT EXISTS services (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT, description TEXT
-        )''')
-        c.execute('''CREATE TABLE IF NOT EXISTS bookings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            customerName TEXT, contact TEXT, serviceType TEXT, date TEXT, status TEXT, notes TEXT
-        )''')
-        c.execute('''CREATE TABLE IF NOT EXISTS tyres (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            brand TEXT, model TEXT, size TEXT, price REAL, offerPrice REAL, 
-            quantity INTEGER, category TEXT, image TEXT, specs TEXT
-        )''')
-        c.execute('''CREATE TABLE IF NOT EXISTS brands (name TEXT PRIMARY KEY)''')
-        c.execute('''CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY, password TEXT
-        )''')
-        c.execute('''CREATE TABLE IF NOT EXISTS settings (
-            key TEXT PRIMARY KEY, value TEXT
-        )''')
-
-        conn.commit()
+        # Hold the write lock for the whole init so that, with several
+        # workers starting together, exactly one migrates and seeds.
+        c.execute('BEGIN IMMEDIATE')
+        migrate(c)
 
         # Seed Admin if missing
         c.execute('SELECT count(*) FROM users')
@@ -0,0 +1,91 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from .tyresize import size_parts
+
+# Partial (PATCH) and bulk edits write only the columns that were sent, with
+# the same encoding as the full PUT handlers. Search and inventory-stats
+# triggers only fire for the columns they watch, so a price change does not
+# touch the search index.
+
+# Fields that may be set to null; everything else must keep a value.
+NULLABLE = {"offerPrice"}
+# Filters compared case-insensitively
+TEXT_FILTERS = {"brand", "category", "transmission"}
+
+def column_values(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Encode the fields of a partial model dump as column -> stored value."""
+    for name, value in fields.items():
+        if value is None and name not in NULLABLE:
+            raise HTTPException(status_code=400, detail=f"{name} cannot be null")
+    columns = dict(fields)
+    for name in ("features", "specs"):
+        if name in columns:
+            columns[name] = json.dumps(columns[name])
+    if "size" in columns:
+        columns["width"], columns["aspect"], columns["rim"] = size_parts(columns["size"])
+    return columns
+
+def decode_row(row) -> dict:
+    d = dict(row)
+    for name in ("features", "specs"):
+        if name in d:
+            d[name] = json.loads(d[name])
+    if "sold" in d:
+        d["sold"] = bool(d["sold"])
+    return d
+
+def patch_row(conn, table: str, row_id: int, columns: Dict[str, Any]) -> Optional[dict]:
+    """Update only `columns` of one row; returns the whole row afterwards, or None if it doesn't exist."""
+    if columns:
+        assignments = ", ".join(f"{name}=?" for name in columns)
+        rows = conn.execute(f"UPDATE {table} SET {assignments} WHERE id=? RETURNING *", [*columns.values(), row_id]).fetchall()
+    else:
+        rows = conn.execute(f"SELECT * FROM {table} WHERE id=?", (row_id,)).fetchall()
+    return decode_row(rows[0]) if rows else None
+
+def filter_clauses(filters: Dict[str, Any]) -> Tuple[List[str], list]:
+    """WHERE clauses for a bulk edit filter; an empty filter is refused rather than matching every row."""
+    clauses, params = [], []
+    for name, value in filters.items():
+        if value is None:
+            continue
+        if name == "ids":
+            if not value:
+                raise HTTPException(status_code=400, detail="ids must not be empty")
+            clauses.append(f"id IN ({','.join('?' * len(value))})")
+            params.extend(value)
+        elif name in TEXT_FILTERS:
+            clauses.append(f"{name} = ? COLLATE NOCASE")
+            params.append(value)
+        else:
+            clauses.append(f"{name} = ?")
+            params.append(value)
+    if not clauses:
+        raise HTTPException(status_code=400, detail="Bulk edit needs a filter")
+    return clauses, params
+
+def price_expressions(price_change_percent: Optional[float], offer_percent_off: Optional[float]) -> Dict[str, Tuple[str, list]]:
+    """Column -> (SQL expression, params) for relative price edits. The offer is taken off the new price."""
+    expressions = {}
+    price = "price"
+    price_params: list = []
+    if price_change_percent is not None:
+        price, price_params = "ROUND(price * ?, 2)", [1 + price_change_percent / 100]
+        expressions["price"] = (price, price_params)
+    if offer_percent_off is not None:
+        expressions["offerPrice"] = (f"ROUND({price} * ?, 2)", price_params + [1 - offer_percent_off / 100])
+    return expressions
+
+def bulk_update(conn, table: str, clauses: List[str], params: list, columns: Dict[str, Any],
+                expressions: Dict[str, Tuple[str, list]]) -> int:
+    """One set-based UPDATE in the caller's transaction. Returns the number of rows changed."""
+    for name in expressions:
+        if name in columns:
+            raise HTTPException(status_code=400, detail=f"{name} is both set and adjusted")
+    assignments = [f"{name}=?" for name in columns] + [f"{name}={sql}" for name, (sql, _) in expressions.items()]
+    if not assignments:
+        raise HTTPException(status_code=400, detail="Nothing to change")
+    values = list(columns.values()) + [p for _, expr_params in expressions.values() for p in expr_params]
+    cur = conn.execute(f"UPDATE {table} SET {', '.join(assignments)} WHERE {' AND '.join(clauses)}", values + params)
+    return cur.rowcount
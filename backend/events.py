@@ -0,0 +1,83 @@
+import asyncio
+import itertools
+import json
+from typing import Optional, Set
+
+# Per-subscriber backlog; a client that falls this far behind is told to resync.
+SUBSCRIBER_QUEUE_SIZE = 256
+HEARTBEAT_SECONDS = 15
+
+_CLOSE = object()
+
+class EventBus:
+    """In-process publish/subscribe for admin change events.
+
+    publish() is safe to call from the sync handlers' worker threads: it hands
+    the event to the event loop, where a single fan-out step copies it into
+    every subscriber's bounded queue. Events are only seen by subscribers
+    connected to the same worker process.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._ids = itertools.count(1)
+        self._closed = False
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._closed = False
+
+    def publish(self, event: str, data: dict):
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self._subscribers:
+            return
+        message = (next(self._ids), event, data)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fan_out(message)
+        else:
+            loop.call_soon_threadsafe(self._fan_out, message)
+
+    def _fan_out(self, message):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Drop the backlog rather than block everyone on one slow client.
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait((message[0], "resync", {}))
+
+    def close(self):
+        """End every stream, and any opened from now on. Safe to call more than once."""
+        self._closed = True
+        for queue in list(self._subscribers):
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(_CLOSE)
+
+    async def stream(self):
+        """Yield server-sent event frames until the client goes away or the bus closes."""
+        queue: asyncio.Queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield "retry: 3000\n\n"
+            while not self._closed:
+                try:
+                    message = await asyncio.wait_for(queue.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is _CLOSE:
+                    break
+                event_id, event, data = message
+                yield f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+        finally:
+            self._subscribers.discard(queue)
+
+event_bus = EventBus()
@@ -0,0 +1,220 @@
+import base64
+import hashlib
+import io
+import multiprocessing
+import os
+import re
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: `pip install Pillow` enables resized and WebP variants
+    Image = None
+
+# Uploaded images are stored once per content hash:
+#   IMAGE_DIR/ab/ab12.../original.jpg   as uploaded
+#   IMAGE_DIR/ab/ab12.../640.webp       resized variants (plus 640.jpg / 640.png)
+# Car.image / TyreProduct.image hold "img:<hash>" instead of a remote URL and
+# clients request /api/images/<hash>/<width>.webp. A file never changes once
+# written, so responses are cacheable forever.
+IMAGE_DIR = os.environ.get("ALEXIS_IMAGE_DIR", "images")
+KEY_PREFIX = "img:"
+VARIANT_WIDTHS = (320, 640, 1280)
+MAX_IMAGE_BYTES = int(os.environ.get("ALEXIS_MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = 40_000_000
+WEBP_QUALITY = 80
+JPEG_QUALITY = 85
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Served in place of a variant that is still being generated (or when Pillow is missing)
+FALLBACK_CACHE_CONTROL = "public, max-age=60"
+
+# Resizing is CPU-bound; like password hashing it runs in separate processes,
+# started on the first upload.
+IMAGE_WORKERS = int(os.environ.get("ALEXIS_IMAGE_WORKERS", "2"))
+
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"GIF87a", "gif"),
+    (b"GIF89a", "gif"),
+)
+MEDIA_TYPES = {"jpg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp"}
+_PIL_FORMATS = {"jpg": "JPEG", "png": "PNG", "webp": "WEBP"}
+_SAVE_OPTIONS = {
+    "jpg": {"quality": JPEG_QUALITY, "optimize": True, "progressive": True},
+    "png": {"optimize": True},
+    "webp": {"quality": WEBP_QUALITY, "method": 4},
+}
+
+_DIGEST_RE = re.compile(r"^[0-9a-f]{32}$")
+_NAME_RE = re.compile(r"^(original\.(jpg|png|gif|webp)|\d+\.(webp|jpg|png))$")
+
+if Image is not None:
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+def sniff_format(data: bytes) -> Optional[str]:
+    """File extension for the image type in the leading bytes, or None if unsupported."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    for signature, ext in _SIGNATURES:
+        if data.startswith(signature):
+            return ext
+    return None
+
+def image_digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:32]
+
+def image_key(digest: str) -> str:
+    return KEY_PREFIX + digest
+
+def image_url(digest: str, name: str) -> str:
+    return f"/api/images/{digest}/{name}"
+
+def image_dir(digest: str) -> str:
+    return os.path.join(IMAGE_DIR, digest[:2], digest)
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _original_name(directory: str) -> Optional[str]:
+    try:
+        return next((n for n in os.listdir(directory) if n.startswith("original.") and not n.endswith(".tmp")), None)
+    except FileNotFoundError:
+        return None
+
+def variants_complete(directory: str) -> bool:
+    return all(os.path.exists(os.path.join(directory, f"{w}.webp")) for w in VARIANT_WIDTHS)
+
+def check_image(data: bytes) -> str:
+    """Validate an upload; returns its extension. Raises ValueError with a client-facing message."""
+    if len(data) > MAX_IMAGE_BYTES:
+        raise ValueError(f"Image is larger than {MAX_IMAGE_BYTES // (1024 * 1024)}MB")
+    ext = sniff_format(data)
+    if ext is None:
+        raise ValueError("Image must be JPEG, PNG, GIF or WebP")
+    if Image is not None:
+        try:
+            with Image.open(io.BytesIO(data)) as img:
+                img.verify()
+        except Exception:
+            raise ValueError("Image file is corrupt or too large")
+    return ext
+
+def store_original(data: bytes, ext: str) -> Tuple[str, str]:
+    """Write the upload under its content hash (a no-op if already stored). Returns (digest, original name)."""
+    digest = image_digest(data)
+    directory = image_dir(digest)
+    os.makedirs(directory, exist_ok=True)
+    name = _original_name(directory)
+    if name is None:
+        name = f"original.{ext}"
+        _write_atomic(os.path.join(directory, name), data)
+    return digest, name
+
+def make_variants(directory: str, original: str) -> List[str]:
+    """Write every width as WebP plus JPEG (PNG if transparent). Never upscales. Runs in a worker process."""
+    written = []
+    with Image.open(os.path.join(directory, original)) as source:
+        img = ImageOps.exif_transpose(source)
+        alpha = img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info)
+        img = img.convert("RGBA" if alpha else "RGB")
+        fallback = "png" if alpha else "jpg"
+        for width in VARIANT_WIDTHS:
+            target = min(width, img.width)
+            size = (target, max(1, round(img.height * target / img.width)))
+            resized = img if size == img.size else img.resize(size, Image.LANCZOS)
+            # WebP last: its presence marks the width as complete
+            for ext in (fallback, "webp"):
+                out = io.BytesIO()
+                resized.save(out, format=_PIL_FORMATS[ext], **_SAVE_OPTIONS[ext])
+                name = f"{width}.{ext}"
+                _write_atomic(os.path.join(directory, name), out.getvalue())
+                written.append(name)
+    return written
+
+def resolve(digest: str, name: str) -> Optional[Tuple[str, str, bool]]:
+    """(path, media type, immutable) for a stored file; a missing variant falls back to the original."""
+    if not _DIGEST_RE.match(digest) or not _NAME_RE.match(name):
+        return None
+    directory = image_dir(digest)
+    path = os.path.join(directory, name)
+    if os.path.isfile(path):
+        return path, MEDIA_TYPES[name.rsplit(".", 1)[1]], True
+    original = _original_name(directory)
+    if original is None:
+        return None
+    return os.path.join(directory, original), MEDIA_TYPES[original.rsplit(".", 1)[1]], False
+
+# --- Worker pool ---
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: never fork a process that is already running threads
+            _executor = ProcessPoolExecutor(IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+def _log_variant_result(digest: str, future: Future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Image variants failed for {digest}: {future.exception()}")
+
+def schedule_variants(digest: str, original: str) -> bool:
+    """Queue variant generation unless it is done already or Pillow is missing. Returns whether variants will exist."""
+    if Image is None:
+        return False
+    directory = image_dir(digest)
+    if not variants_complete(directory):
+        future = _get_executor().submit(make_variants, directory, original)
+        future.add_done_callback(lambda f: _log_variant_result(digest, f))
+    return True
+
+def shutdown_image_pool():
+    """Wait for queued variants so no upload is left without its thumbnails."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+# --- Moving inline images into the store ---
+
+def import_inline_images(conn) -> int:
+    """Replace data: URLs in cars/tyres (from the old admin form) with stored image keys."""
+    moved = 0
+    for table in ("cars", "tyres"):
+        rows = conn.execute(f"SELECT id, image FROM {table} WHERE image LIKE 'data:image/%'").fetchall()
+        for row_id, image in rows:
+            try:
+                data = base64.b64decode(image.split(",", 1)[1])
+                ext = check_image(data)
+            except (IndexError, ValueError) as e:
+                print(f"Skipping {table} {row_id}: {e}")
+                continue
+            digest, original = store_original(data, ext)
+            if Image is not None and not variants_complete(image_dir(digest)):
+                make_variants(image_dir(digest), original)
+            conn.execute(f"UPDATE {table} SET image=? WHERE id=?", (image_key(digest), row_id))
+            moved += 1
+    conn.commit()
+    return moved
+
+if __name__ == "__main__":
+    from backend.database import connect
+    if sys.argv[1:] == ["import-inline"]:
+        conn = connect()
+        print(f"Moved {import_inline_images(conn)} inline images into {IMAGE_DIR}/ (restart the server to refresh its cache)")
+        conn.close()
+    else:
+        print("usage: python -m backend.images import-inline")
+        sys.exit(2)
@@ -4,28 +4,106 @@ import os
 
 # --- PATH FIX FOR DIRECT EXECUTION ---
 # This allows running `python backend/main.py` without "ImportError: attempted relative import..."
-if __name__ == "__main__" and __package__ is None:
+# (__mp_main__ covers the spawned password-hashing workers re-importing this file)
+if __name__ in ("__main__", "__mp_main__") and not __package__:
     file_path = os.path.abspath(__file__)
     backend_dir = os.path.dirname(file_path)
     root_dir = os.path.dirname(backend_dir)
     sys.path.append(root_dir)
     __package__ = "backend"
 
+import asyncio
+import signal
+import threading
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from .database import init_db
-from .auth import get_password_hash
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
+from anyio import to_thread
+from .async_db import db
+from .booking_queue import booking_queue
+from .cache import catalogue_cache
+from .database import init_db, init_pool, close_pool
+from .events import event_bus
+from .images import Image, shutdown_image_pool
+from .metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from .responses import COMPRESS_MIN_SIZE
+from .stock import stock_coalescer
+from .auth import get_password_hash, start_hash_pool, shutdown_hash_pool
 from .routers import public, admin
 
+# Number of server processes. Above 1, catalogue cache invalidations are shared
+# through the database and JWT keys come from a shared key file (signing_keys.py).
+WORKERS = int(os.environ.get("ALEXIS_WORKERS", "1"))
+# How long uvicorn waits for open requests on shutdown before cancelling them
+# and running the lifespan shutdown (keep it under the supervisor's kill timeout).
+GRACEFUL_SHUTDOWN_SECONDS = int(os.environ.get("ALEXIS_GRACEFUL_SHUTDOWN_SECONDS", "10"))
+
 # --- App Lifecycle ---
+_shutdown_tasks = set()
+
+def _begin_shutdown():
+    event_bus.close()
+    # Write out queued bookings now rather than after every connection has closed
+    if booking_queue is not None:
+        task = asyncio.ensure_future(booking_queue.drain())
+        _shutdown_tasks.add(task)
+        task.add_done_callback(_shutdown_tasks.discard)
+
+def _begin_shutdown_on_exit_signal(loop: asyncio.AbstractEventLoop):
+    """Close the admin event streams and drain queued bookings as soon as uvicorn is told to exit.
+
+    uvicorn waits for open connections before it runs the lifespan shutdown,
+    and an event stream never ends by itself, so doing this there would
+    never happen while an admin tab is open. The handler is chained in front
+    of uvicorn's own (installed before the lifespan starts).
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        def handler(signum, frame, previous=previous):
+            loop.call_soon_threadsafe(_begin_shutdown)
+            if callable(previous):
+                previous(signum, frame)
+            elif previous == signal.SIG_DFL:
+                signal.signal(signum, signal.SIG_DFL)
+                signal.raise_signal(signum)
+        signal.signal(sig, handler)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Startup: Initialize DB
+    # Startup: Start hashing workers, initialize DB
+    start_hash_pool()
     init_db(get_password_hash)
+    if Image is None:
+        print("WARNING: Pillow is not installed; uploaded images are served without resized/WebP variants")
+    # One pooled connection per threadpool worker
+    init_pool(to_thread.current_default_thread_limiter().total_tokens)
+    db.start()
+    if booking_queue is not None:
+        booking_queue.start()
+    cache_sync = None
+    if WORKERS > 1:
+        catalogue_cache.enable_shared_versions()
+        cache_sync = asyncio.create_task(catalogue_cache.sync_shared_versions())
+    event_bus.bind(asyncio.get_running_loop())
+    _begin_shutdown_on_exit_signal(asyncio.get_running_loop())
     yield
-    # Shutdown: Clean up if needed
+    # Shutdown: Write out queued bookings, end event streams, write out pending stock deltas,
+    # finish queued image variants, close connections and worker processes
+    if booking_queue is not None:
+        await booking_queue.drain()
+    if cache_sync is not None:
+        cache_sync.cancel()
+    event_bus.close()
+    if stock_coalescer is not None:
+        stock_coalescer.flush()
+    shutdown_image_pool()
+    db.close()
+    close_pool()
+    shutdown_hash_pool()
 
 app = FastAPI(title="Alexis Autos API", lifespan=lifespan)
 
@@ -39,6 +117,15 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# --- COMPRESSION MIDDLEWARE ---
+# Cached catalogue bodies arrive pre-compressed (see responses.cached_response)
+# and are passed through untouched; this covers everything else.
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESS_MIN_SIZE, compresslevel=6)
+
+# --- METRICS MIDDLEWARE ---
+# Added last so it is outermost and times the whole request
+app.add_middleware(MetricsMiddleware)
+
 # --- Global Exception Handler ---
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -56,7 +143,27 @@ app.include_router(admin.router, prefix="/api", tags=["Admin"])
 def read_root():
     return {"message": "Alexis Autos API Secure"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint for this worker process."""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
 if __name__ == "__main__":
+    import argparse
     import uvicorn
-    init_db(get_password_hash)
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    parser = argparse.ArgumentParser(description="Run the Alexis Autos API")
+    parser.add_argument("--host", default=os.environ.get("ALEXIS_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("ALEXIS_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        # Migrate once up front; each worker's lifespan then only checks the version
+        init_db(get_password_hash)
+        shutdown_hash_pool()
+        # Workers re-import the app by name and read ALEXIS_WORKERS in lifespan
+        os.environ["ALEXIS_WORKERS"] = str(args.workers)
+        uvicorn.run("backend.main:app", host=args.host, port=args.port, workers=args.workers,
+                    timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS)
@@ -0,0 +1,262 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Prometheus text exposition without the client library. Values are per
+# process; with several workers, scrape each one or aggregate upstream.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Requests slower than this (ms) are logged with their slowest SQL; 0 disables.
+SLOW_REQUEST_MS = int(os.environ.get("ALEXIS_SLOW_REQUEST_MS", "0"))
+SLOW_LOG_STATEMENTS = 5
+MAX_TRACKED_STATEMENTS = 500
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+_registry: List["_Metric"] = []
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{str(v)}"'.replace("\n", " ") for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in items]
+
+class Gauge(_Metric):
+    """A settable gauge; with `callback` the values are read at scrape time instead."""
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 callback: Optional[Callable[[], Dict[tuple, float]]] = None):
+        super().__init__(name, help, labels)
+        self._values: Dict[tuple, float] = {}
+        self.callback = callback
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, *label_values, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+    def _samples(self):
+        if self.callback is not None:
+            items = list(self.callback().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return [f"{self.name}{_labels(self.label_names, k)} {v}" for k, v in items]
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float], labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[tuple, List[float]] = {}
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def _samples(self):
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._series.items()]
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+def render_metrics() -> str:
+    return "\n".join(line for metric in _registry for line in metric.render()) + "\n"
+
+# --- HTTP ---
+
+HTTP_REQUESTS = Counter("alexis_http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+HTTP_LATENCY = Histogram("alexis_http_request_duration_seconds", "Time to serve a request (event streams excluded).",
+                         LATENCY_BUCKETS, ("method", "route"))
+HTTP_IN_FLIGHT = Gauge("alexis_http_requests_in_flight", "Requests currently being served, including open event streams.")
+REQUEST_SQL_STATEMENTS = Histogram("alexis_request_sql_statements", "SQL statements executed per request.",
+                                   SQL_COUNT_BUCKETS, ("route",))
+REQUEST_SQL_SECONDS = Histogram("alexis_request_sql_duration_seconds", "Time spent in SQL per request.",
+                                LATENCY_BUCKETS, ("route",))
+
+# --- SQL ---
+
+SQL_STATEMENTS = Counter("alexis_sql_statements_total", "SQL statements executed on traced connections.")
+SQL_LATENCY = Histogram("alexis_sql_statement_duration_seconds", "Duration of individual SQL statements.", SQL_LATENCY_BUCKETS)
+
+class RequestStats:
+    __slots__ = ("statements", "sql_seconds", "queries")
+
+    def __init__(self):
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.queries: List[Tuple[float, str]] = []
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("alexis_request_stats", default=None)
+
+def record_statement(sql: str, seconds: float):
+    SQL_STATEMENTS.inc()
+    SQL_LATENCY.observe(seconds)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += seconds
+        if SLOW_REQUEST_MS and len(stats.queries) < MAX_TRACKED_STATEMENTS:
+            stats.queries.append((seconds, sql))
+
+class _Timed:
+    """Times execute()/executemany()/executescript() into the metrics above.
+
+    The stdlib module has a trace hook but no profile hook, so durations are
+    measured around each call: preparing and running a statement up to its
+    first row. Time spent fetching later rows is not included, and a script
+    counts as one statement.
+    """
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_statement(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_statement(sql, time.perf_counter() - start)
+
+    def executescript(self, sql_script):
+        start = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            record_statement(sql_script, time.perf_counter() - start)
+
+class TracedCursor(_Timed, sqlite3.Cursor):
+    pass
+
+class TracedConnection(_Timed, sqlite3.Connection):
+    """sqlite3 connection whose statements are timed, whether run on the connection or a cursor."""
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+# --- Middleware ---
+
+def _log_slow_request(scope, status: int, elapsed: float, stats: RequestStats):
+    print(f"Slow request: {scope['method']} {scope['path']} -> {status} in {elapsed * 1000:.0f}ms, "
+          f"{stats.statements} SQL statements ({stats.sql_seconds * 1000:.0f}ms)")
+    for seconds, sql in sorted(stats.queries, reverse=True)[:SLOW_LOG_STATEMENTS]:
+        sql = re.sub(r"\s+", " ", sql).strip()
+        print(f"  {seconds * 1000:.1f}ms  {sql}")
+
+def _route_label(scope) -> str:
+    """The matched route template (e.g. /api/cars/{car_id}), keeping label cardinality bounded."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Routers included with a prefix report their path without it (/cars/{car_id}),
+    # so put back whatever part of the request path came before the route's match
+    path = scope["path"]
+    for i, ch in enumerate(path):
+        if ch == "/" and route.path_regex.match(path[i:]):
+            return path[:i] + route.path
+    return route.path
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: per-route latency, in-flight count and SQL per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status = 500
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                streaming = any(k == b"content-type" and v.startswith(b"text/event-stream")
+                                for k, v in message.get("headers", []))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            _request_stats.reset(token)
+            route = _route_label(scope)
+            HTTP_REQUESTS.inc(scope["method"], route, str(status))
+            if not streaming:
+                HTTP_LATENCY.observe(elapsed, scope["method"], route)
+                REQUEST_SQL_STATEMENTS.observe(stats.statements, route)
+                REQUEST_SQL_SECONDS.observe(stats.sql_seconds, route)
+                if SLOW_REQUEST_MS and elapsed * 1000 >= SLOW_REQUEST_MS:
+                    _log_slow_request(scope, status, elapsed, stats)
@@ -0,0 +1,168 @@
+import sys
+from datetime import datetime
+from typing import Callable, List, Tuple
+from .bookings import backfill_booking_dates
+from .search import ensure_search_index
+from .stats import ensure_inventory_stats
+from .tyresize import size_parts
+
+# Ordered schema migrations. Each runs once, inside init_db's write
+# transaction, and is recorded in schema_version. Steps are written to be
+# safe on databases created before versioning, which start at version 0.
+# Add new steps at the end; never renumber or edit an applied one.
+
+def _base_tables(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS cars (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        model TEXT, year INTEGER, engine TEXT, price REAL, image TEXT, 
+        sold BOOLEAN, mileage INTEGER, transmission TEXT, description TEXT, features TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS services (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT, description TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS bookings (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customerName TEXT, contact TEXT, serviceType TEXT, date TEXT, status TEXT, notes TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS tyres (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        brand TEXT, model TEXT, size TEXT, price REAL, offerPrice REAL, 
+        quantity INTEGER, category TEXT, image TEXT, specs TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS brands (name TEXT PRIMARY KEY)''')
+    c.execute('''CREATE TABLE IF NOT EXISTS users (
+        username TEXT PRIMARY KEY, password TEXT
+    )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS settings (
+        key TEXT PRIMARY KEY, value TEXT
+    )''')
+
+def _listing_indexes(c):
+    # Indexes backing the keyset-paginated /cars and /tyres listings
+    c.execute('CREATE INDEX IF NOT EXISTS idx_cars_price ON cars (price, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_cars_year ON cars (year, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_cars_mileage ON cars (mileage, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_cars_sold_price ON cars (sold, price, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tyres_price ON tyres (price, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tyres_brand_price ON tyres (brand, price, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tyres_category_price ON tyres (category, price, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tyres_quantity ON tyres (quantity, id)')
+
+def _tyre_sizes(c):
+    """Parsed width/aspect/rim columns for fitment search."""
+    existing = {row[1] for row in c.execute('PRAGMA table_info(tyres)')}
+    for column in ('width', 'aspect', 'rim'):
+        if column not in existing:
+            c.execute(f'ALTER TABLE tyres ADD COLUMN {column} INTEGER')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tyres_fitment ON tyres (rim, width, aspect, id)')
+    rows = c.execute('SELECT id, size FROM tyres WHERE width IS NULL').fetchall()
+    updates = [(*size_parts(r[1]), r[0]) for r in rows]
+    updates = [u for u in updates if u[0] is not None]
+    if updates:
+        print(f"Backfilling parsed sizes for {len(updates)} tyres...")
+        c.executemany('UPDATE tyres SET width=?, aspect=?, rim=? WHERE id=?', updates)
+
+def _cache_versions(c):
+    # Catalogue cache versions shared between worker processes
+    c.execute('''CREATE TABLE IF NOT EXISTS cache_versions (
+        key TEXT PRIMARY KEY, version INTEGER NOT NULL
+    )''')
+
+def _tyre_natural_key(c):
+    # Natural-key lookup for bulk imports without ids
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tyres_natural ON tyres (brand, model, size)')
+
+def _filtered_listing_indexes(c):
+    # "newest" (id DESC) under a filter, so a filtered page reads only its rows
+    c.execute('CREATE INDEX IF NOT EXISTS idx_cars_sold_id ON cars (sold, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_cars_model ON cars (model)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tyres_brand_id ON tyres (brand, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tyres_category_id ON tyres (category, id)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tyres_in_stock_id ON tyres (id) WHERE quantity > 0')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_tyres_out_of_stock_id ON tyres (id) WHERE quantity <= 0')
+
+# Catalogue tables whose rows feed a cached body of the same name
+CACHED_TABLES = ("cars", "tyres", "services", "brands")
+_BUMP_SQL = ("INSERT INTO cache_versions (key, version) VALUES ({key}, 1) "
+             "ON CONFLICT(key) DO UPDATE SET version = version + 1")
+
+def _cache_version_triggers(c):
+    # Shared cache versions move in the same transaction as the write that
+    # stales them, so a committed change is always visible to other workers.
+    for table in CACHED_TABLES:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            c.execute(f"CREATE TRIGGER IF NOT EXISTS {table}_cache_{event.lower()} AFTER {event} ON {table} "
+                      f"BEGIN {_BUMP_SQL.format(key=repr(table))}; END")
+    for event, row in (("INSERT", "new"), ("UPDATE", "new"), ("DELETE", "old")):
+        bump = _BUMP_SQL.format(key=f"'settings:' || {row}.key")
+        c.execute(f"CREATE TRIGGER IF NOT EXISTS settings_cache_{event.lower()} AFTER {event} ON settings BEGIN {bump}; END")
+
+def _booking_slots(c):
+    backfill_booking_dates(c)
+    c.execute('CREATE INDEX IF NOT EXISTS idx_bookings_slot ON bookings (date, serviceType, status)')
+
+def _booking_change_tracking(c):
+    existing = {row[1] for row in c.execute('PRAGMA table_info(bookings)')}
+    for column, decl in (('created_at', 'TEXT'), ('updated_at', 'TEXT'), ('version', 'INTEGER')):
+        if column not in existing:
+            c.execute(f'ALTER TABLE bookings ADD COLUMN {column} {decl}')
+    # Legacy rows get their id as version; new writes always go above MAX(version).
+    c.execute('UPDATE bookings SET version = id WHERE version IS NULL')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_bookings_version ON bookings (version)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_bookings_status_date ON bookings (status, date, id)')
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "base tables", _base_tables),
+    (2, "listing indexes", _listing_indexes),
+    (3, "tyre size columns", _tyre_sizes),
+    (4, "cache versions", _cache_versions),
+    (5, "tyre natural key index", _tyre_natural_key),
+    (6, "booking slots", _booking_slots),
+    (7, "booking change tracking", _booking_change_tracking),
+    (8, "search index", ensure_search_index),
+    (9, "inventory stats", ensure_inventory_stats),
+    (10, "filtered listing indexes", _filtered_listing_indexes),
+    (11, "cache version triggers", _cache_version_triggers),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(conn) -> int:
+    """The applied schema version, from one indexed lookup; 0 for an unversioned database."""
+    try:
+        return conn.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+    except Exception:
+        return 0
+
+def migrate(c) -> int:
+    """Apply pending migrations in the caller's transaction. Returns how many ran."""
+    c.execute('''CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY, name TEXT, applied_at TEXT
+    )''')
+    # Re-read under the write lock: another worker may have just migrated.
+    applied = current_version(c)
+    pending = [m for m in MIGRATIONS if m[0] > applied]
+    for version, name, step in pending:
+        print(f"Applying migration {version}: {name}")
+        step(c)
+        c.execute('INSERT INTO schema_version (version, name, applied_at) VALUES (?,?,?)',
+                  (version, name, datetime.utcnow().isoformat(timespec="seconds") + "Z"))
+    return len(pending)
+
+if __name__ == "__main__":
+    from backend.auth import get_password_hash, shutdown_hash_pool
+    from backend.database import connect, init_db
+    if sys.argv[1:] == ["status"]:
+        conn = connect()
+        version = current_version(conn)
+        conn.close()
+        print(f"Schema version {version} of {LATEST_VERSION}")
+        for number, name, _ in MIGRATIONS:
+            if number > version:
+                print(f"  pending {number}: {name}")
+    elif sys.argv[1:] == ["upgrade"]:
+        init_db(get_password_hash)
+        shutdown_hash_pool()
+    else:
+        print("usage: python -m backend.migrations status|upgrade")
+        sys.exit(2)
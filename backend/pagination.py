@@ -0,0 +1,51 @@
+import base64
+import json
+from typing import List, Optional, Sequence, Tuple
+from fastapi import HTTPException
+
+def encode_cursor(value, row_id: int) -> str:
+    raw = json.dumps([value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[object, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return value, int(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_page(conn, table: str, where: Sequence[str], params: Sequence, sort_column: str,
+                descending: bool, cursor: Optional[str], limit: int, columns: str = "*"):
+    """Fetch one page ordered by (sort_column, id) starting after `cursor`.
+
+    `table`, `where` and `sort_column` are trusted SQL fragments; only `params`
+    and the cursor values are bound. Returns (rows, next_cursor).
+    """
+    clauses: List[str] = list(where)
+    args = list(params)
+    op = "<" if descending else ">"
+    direction = "DESC" if descending else "ASC"
+
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        if sort_column == "id":
+            clauses.append(f"id {op} ?")
+            args.append(last_id)
+        else:
+            clauses.append(f"({sort_column}, id) {op} (?, ?)")
+            args.extend([value, last_id])
+
+    order = f"id {direction}" if sort_column == "id" else f"{sort_column} {direction}, id {direction}"
+    sql = f"SELECT {columns} FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += f" ORDER BY {order} LIMIT ?"
+    rows = conn.execute(sql, args + [limit + 1]).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last[sort_column], last["id"])
+    return rows, next_cursor
@@ -0,0 +1,59 @@
+import gzip
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+from .cache import CachedBody
+
+try:
+    import brotli
+except ImportError:  # listed in requirements.txt; without it cached bodies are offered as gzip only
+    brotli = None
+
+# Bodies smaller than this are sent as-is; matches the GZipMiddleware threshold in main.py.
+COMPRESS_MIN_SIZE = 1024
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=11)
+    return gzip.compress(body, compresslevel=9)
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    offered = {part.split(";")[0].strip().lower() for part in accept_encoding.split(",")}
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return None
+
+def _not_modified(request: Request, cached: CachedBody) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or cached.etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(cached.last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def cached_response(request: Request, cached: CachedBody, media_type: str = "application/json") -> Response:
+    """Serve a cached body with ETag/Last-Modified validation and pre-compressed variants."""
+    headers = {
+        "ETag": cached.etag,
+        "Last-Modified": formatdate(cached.last_modified, usegmt=True),
+        # Clients may store the body but must revalidate; a 304 costs one hash comparison.
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if _not_modified(request, cached):
+        return Response(status_code=304, headers=headers)
+
+    body = cached.body
+    if len(body) >= COMPRESS_MIN_SIZE:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding:
+            body = cached.encoded(encoding, compress)
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -1,27 +1,46 @@
 
 import json
 import sqlite3
-from typing import List, Any
-from fastapi import APIRouter, HTTPException, Depends, status
+from typing import List, Any, Optional, Union
+from fastapi import APIRouter, HTTPException, Depends, File, Query, Request, UploadFile, status
+from fastapi.responses import StreamingResponse
 from datetime import timedelta
+from ..async_db import db
+from ..bookings import NEXT_VERSION_SQL, NOW_SQL
+from ..cache import catalogue_cache
+from ..edits import bulk_update, column_values, filter_clauses, patch_row, price_expressions
+from ..events import event_bus
+from ..images import MAX_IMAGE_BYTES, VARIANT_WIDTHS, check_image, image_key, image_url, schedule_variants, store_original
 from ..database import get_db
-from ..schemas import Booking, UserLogin, Token, Car, ServiceItem, TyreProduct, TyreBrand, SettingsUpdate
-from ..auth import verify_password, create_access_token, get_current_user, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
+from ..pagination import keyset_page
+from ..schemas import (Booking, BookingPage, UserLogin, Token, Car, ServiceItem, TyreProduct, TyreBrand, SettingsUpdate, StockBatch, ImageUpload,
+                       InventoryStats, CarPatch, TyrePatch, ServicePatch, CarBulkEdit, TyreBulkEdit, ServiceBulkEdit, BulkEditResult)
+from ..stats import inventory_summary
+from ..stock import apply_stock_deltas, stock_coalescer
+from ..tyresize import size_parts
+from ..tyre_io import IMPORT_BATCH_SIZE, ErrorReport, iter_records, validate_records, upsert_batch, export_rows
+from ..auth import (verify_and_update_password_async, create_access_token, create_stream_ticket, get_current_user, get_stream_user,
+                    get_password_hash_async, invalidate_principal, ACCESS_TOKEN_EXPIRE_MINUTES, STREAM_TICKET_SECONDS)
 
 router = APIRouter()
 
+def _fetch_user(conn, username: str):
+    return conn.execute('SELECT * FROM users WHERE username=?', (username,)).fetchone()
+
 @router.post("/login", response_model=Token)
-def login(user: UserLogin):
-    conn = get_db()
-    row = conn.execute('SELECT * FROM users WHERE username=?', (user.username,)).fetchone()
-    conn.close()
+async def login(user: UserLogin):
+    row = await db.read(_fetch_user, user.username)
+    valid, new_hash = await verify_and_update_password_async(user.password, row['password']) if row else (False, None)
     
-    if not row or not verify_password(user.password, row['password']):
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Hashing parameters changed since this password was stored
+        await db.execute('UPDATE users SET password=? WHERE username=?', (new_hash, user.username))
     
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -31,167 +50,370 @@ def login(user: UserLogin):
 
 # --- Protected ---
 
-@router.get("/bookings", response_model=List[Booking])
-def get_bookings(current_user: Any = Depends(get_current_user)):
-    conn = get_db()
-    rows = conn.execute('SELECT * FROM bookings').fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
+# sort name -> (column, descending)
+BOOKING_SORTS = {
+    "newest": ("id", True),
+    "date_asc": ("date", False),
+    "date_desc": ("date", True),
+}
+
+def _all_bookings(conn):
+    return [dict(r) for r in conn.execute('SELECT * FROM bookings')]
+
+def _bookings_since(conn, where: list, params: list, limit: int):
+    return conn.execute(
+        'SELECT * FROM bookings WHERE ' + ' AND '.join(where) + ' ORDER BY version LIMIT ?',
+        params + [limit + 1]
+    ).fetchall()
+
+def _bookings_page(conn, where: list, params: list, column: str, descending: bool, cursor: Optional[str], limit: int):
+    rows, next_cursor = keyset_page(conn, 'bookings', where, params, column, descending, cursor, limit)
+    version = conn.execute('SELECT COALESCE(MAX(version), 0) FROM bookings').fetchone()[0]
+    return rows, next_cursor, version
+
+@router.get("/bookings", response_model=Union[List[Booking], BookingPage])
+async def get_bookings(
+    request: Request,
+    status_filter: Optional[str] = Query(None, alias="status"),
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    since: Optional[int] = Query(None, ge=0),
+    sort: str = "newest",
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Any = Depends(get_current_user),
+):
+    # Without query parameters this stays the full list older dashboards expect.
+    if not request.query_params:
+        return await db.read(_all_bookings)
+
+    where, params = [], []
+    if status_filter:
+        where.append('status = ?')
+        params.append(status_filter)
+    if date_from:
+        where.append('date >= ?')
+        params.append(date_from)
+    if date_to:
+        # Slot keys may carry a time, so compare against the following day
+        where.append('date < ?')
+        params.append(date_to + '\uffff')
+
+    if since is not None:
+        # Delta sync: everything changed after the client's last version, oldest change first
+        where.append('version > ?')
+        params.append(since)
+        rows = await db.read(_bookings_since, where, params, limit)
+        more = len(rows) > limit
+        rows = rows[:limit]
+        version = rows[-1]['version'] if rows else since
+        return {"items": [dict(r) for r in rows], "next_cursor": str(version) if more else None, "version": version}
+
+    if sort not in BOOKING_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort '{sort}'")
+    column, descending = BOOKING_SORTS[sort]
+    rows, next_cursor, version = await db.read(_bookings_page, where, params, column, descending, cursor, limit)
+    return {"items": [dict(r) for r in rows], "next_cursor": next_cursor, "version": version}
+
+def _set_booking_status(conn, booking_id: int, new_status: str):
+    conn.execute(
+        f'UPDATE bookings SET status=?, updated_at={NOW_SQL}, version={NEXT_VERSION_SQL} WHERE id=?',
+        (new_status, booking_id)
+    )
+    return conn.execute('SELECT version FROM bookings WHERE id=?', (booking_id,)).fetchone()
 
 @router.put("/bookings/{booking_id}/status")
-def update_booking_status(booking_id: int, update: dict, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
-    conn.execute('UPDATE bookings SET status=? WHERE id=?', (update['status'], booking_id))
-    conn.commit()
-    conn.close()
+async def update_booking_status(booking_id: int, update: dict, current_user: Any = Depends(get_current_user)):
+    row = await db.write(_set_booking_status, booking_id, update['status'])
+    if row:
+        event_bus.publish("booking.status", {"id": booking_id, "status": update['status'], "version": row['version']})
     return {"status": "success"}
 
 @router.post("/users")
-def add_user(user: UserLogin, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
-    hashed_pw = get_password_hash(user.password)
+async def add_user(user: UserLogin, current_user: Any = Depends(get_current_user)):
+    hashed_pw = await get_password_hash_async(user.password)
     try:
-        conn.execute('INSERT INTO users (username, password) VALUES (?,?)', (user.username, hashed_pw))
-        conn.commit()
+        await db.execute('INSERT INTO users (username, password) VALUES (?,?)', (user.username, hashed_pw))
+        invalidate_principal(user.username)
         return {"status": "success"}
     except sqlite3.IntegrityError:
         raise HTTPException(status_code=400, detail="Username exists")
-    finally:
-        conn.close()
 
 @router.put("/users/{username}/password")
-def change_password(username: str, data: dict, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
-    hashed_pw = get_password_hash(data['password'])
-    conn.execute('UPDATE users SET password=? WHERE username=?', (hashed_pw, username))
-    conn.commit()
-    conn.close()
+async def change_password(username: str, data: dict, current_user: Any = Depends(get_current_user)):
+    hashed_pw = await get_password_hash_async(data['password'])
+    await db.execute('UPDATE users SET password=? WHERE username=?', (hashed_pw, username))
+    invalidate_principal(username)
+    return {"status": "success"}
+
+@router.delete("/users/{username}")
+async def delete_user(username: str, current_user: Any = Depends(get_current_user)):
+    if username == current_user["username"]:
+        raise HTTPException(status_code=400, detail="You cannot delete your own account")
+    await db.execute('DELETE FROM users WHERE username=?', (username,))
+    invalidate_principal(username)
     return {"status": "success"}
 
 @router.post("/cars", response_model=Car)
-def add_car(car: Car, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
+async def add_car(car: Car, current_user: Any = Depends(get_current_user)):
     features_json = json.dumps(car.features)
-    cur = conn.execute(
+    car.id = await db.execute(
         'INSERT INTO cars (model, year, engine, price, image, sold, mileage, transmission, description, features) VALUES (?,?,?,?,?,?,?,?,?,?)',
         (car.model, car.year, car.engine, car.price, car.image, car.sold, car.mileage, car.transmission, car.description, features_json)
     )
-    conn.commit()
-    car.id = cur.lastrowid
-    conn.close()
+    catalogue_cache.bump("cars")
+    event_bus.publish("car.created", car.dict())
     return car
 
 @router.put("/cars/{car_id}")
-def update_car(car_id: int, car: Car, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
+async def update_car(car_id: int, car: Car, current_user: Any = Depends(get_current_user)):
     features_json = json.dumps(car.features)
-    conn.execute(
+    await db.execute(
         'UPDATE cars SET model=?, year=?, engine=?, price=?, image=?, sold=?, mileage=?, transmission=?, description=?, features=? WHERE id=?',
         (car.model, car.year, car.engine, car.price, car.image, car.sold, car.mileage, car.transmission, car.description, features_json, car_id)
     )
-    conn.commit()
-    conn.close()
+    catalogue_cache.bump("cars")
+    car.id = car_id
+    event_bus.publish("car.sold" if car.sold else "car.updated", car.dict())
     return car
 
+@router.patch("/cars/{car_id}", response_model=Car)
+async def patch_car(car_id: int, patch: CarPatch, current_user: Any = Depends(get_current_user)):
+    fields = patch.dict(exclude_unset=True)
+    row = await db.write(patch_row, 'cars', car_id, column_values(fields))
+    if row is None:
+        raise HTTPException(status_code=404, detail="Car not found")
+    car = Car(**row)
+    if fields:
+        catalogue_cache.bump("cars")
+        event_bus.publish("car.sold" if fields.get("sold") else "car.updated", car.dict())
+    return car
+
+@router.post("/cars/bulk-edit", response_model=BulkEditResult)
+async def bulk_edit_cars(edit: CarBulkEdit, current_user: Any = Depends(get_current_user)):
+    """One UPDATE for every matching car, e.g. {"filter": {"ids": [...]}, "changes": {"sold": true}}."""
+    clauses, params = filter_clauses(edit.filter.dict())
+    updated = await db.write(bulk_update, 'cars', clauses, params, column_values(edit.changes.dict(exclude_unset=True)),
+                             price_expressions(edit.priceChangePercent, None))
+    if updated:
+        catalogue_cache.bump("cars")
+        event_bus.publish("cars.bulk_edited", {"updated": updated})
+    return {"updated": updated}
+
 @router.delete("/cars/{car_id}")
-def delete_car(car_id: int, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
-    conn.execute('DELETE FROM cars WHERE id=?', (car_id,))
-    conn.commit()
-    conn.close()
+async def delete_car(car_id: int, current_user: Any = Depends(get_current_user)):
+    await db.execute('DELETE FROM cars WHERE id=?', (car_id,))
+    catalogue_cache.bump("cars")
+    event_bus.publish("car.deleted", {"id": car_id})
     return {"status": "success"}
 
 @router.post("/services", response_model=ServiceItem)
-def add_service(service: ServiceItem, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
-    cur = conn.execute('INSERT INTO services (name, description) VALUES (?,?)', (service.name, service.description))
-    conn.commit()
-    service.id = cur.lastrowid
-    conn.close()
+async def add_service(service: ServiceItem, current_user: Any = Depends(get_current_user)):
+    service.id = await db.execute('INSERT INTO services (name, description) VALUES (?,?)', (service.name, service.description))
+    catalogue_cache.bump("services")
     return service
 
 @router.put("/services/{service_id}")
-def update_service(service_id: int, service: ServiceItem, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
-    conn.execute('UPDATE services SET name=?, description=? WHERE id=?', (service.name, service.description, service_id))
-    conn.commit()
-    conn.close()
+async def update_service(service_id: int, service: ServiceItem, current_user: Any = Depends(get_current_user)):
+    await db.execute('UPDATE services SET name=?, description=? WHERE id=?', (service.name, service.description, service_id))
+    catalogue_cache.bump("services")
     return service
 
+@router.patch("/services/{service_id}", response_model=ServiceItem)
+async def patch_service(service_id: int, patch: ServicePatch, current_user: Any = Depends(get_current_user)):
+    fields = patch.dict(exclude_unset=True)
+    row = await db.write(patch_row, 'services', service_id, column_values(fields))
+    if row is None:
+        raise HTTPException(status_code=404, detail="Service not found")
+    if fields:
+        catalogue_cache.bump("services")
+    return row
+
+@router.post("/services/bulk-edit", response_model=BulkEditResult)
+async def bulk_edit_services(edit: ServiceBulkEdit, current_user: Any = Depends(get_current_user)):
+    clauses, params = filter_clauses(edit.filter.dict())
+    updated = await db.write(bulk_update, 'services', clauses, params, column_values(edit.changes.dict(exclude_unset=True)), {})
+    if updated:
+        catalogue_cache.bump("services")
+    return {"updated": updated}
+
 @router.delete("/services/{service_id}")
-def delete_service(service_id: int, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
-    conn.execute('DELETE FROM services WHERE id=?', (service_id,))
-    conn.commit()
-    conn.close()
+async def delete_service(service_id: int, current_user: Any = Depends(get_current_user)):
+    await db.execute('DELETE FROM services WHERE id=?', (service_id,))
+    catalogue_cache.bump("services")
     return {"status": "success"}
 
 @router.post("/tyres", response_model=TyreProduct)
-def add_tyre(tyre: TyreProduct, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
+async def add_tyre(tyre: TyreProduct, current_user: Any = Depends(get_current_user)):
     specs_json = json.dumps(tyre.specs.dict())
-    cur = conn.execute(
-        'INSERT INTO tyres (brand, model, size, price, offerPrice, quantity, category, image, specs) VALUES (?,?,?,?,?,?,?,?,?)',
-        (tyre.brand, tyre.model, tyre.size, tyre.price, tyre.offerPrice, tyre.quantity, tyre.category, tyre.image, specs_json)
+    width, aspect, rim = size_parts(tyre.size)
+    tyre.id = await db.execute(
+        'INSERT INTO tyres (brand, model, size, price, offerPrice, quantity, category, image, specs, width, aspect, rim) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)',
+        (tyre.brand, tyre.model, tyre.size, tyre.price, tyre.offerPrice, tyre.quantity, tyre.category, tyre.image, specs_json, width, aspect, rim)
     )
-    conn.commit()
-    tyre.id = cur.lastrowid
-    conn.close()
+    catalogue_cache.bump("tyres")
+    event_bus.publish("tyre.created", tyre.dict())
     return tyre
 
 @router.put("/tyres/{tyre_id}")
-def update_tyre(tyre_id: int, tyre: TyreProduct, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
+async def update_tyre(tyre_id: int, tyre: TyreProduct, current_user: Any = Depends(get_current_user)):
     specs_json = json.dumps(tyre.specs.dict())
-    conn.execute(
-        'UPDATE tyres SET brand=?, model=?, size=?, price=?, offerPrice=?, quantity=?, category=?, image=?, specs=? WHERE id=?',
-        (tyre.brand, tyre.model, tyre.size, tyre.price, tyre.offerPrice, tyre.quantity, tyre.category, tyre.image, specs_json, tyre_id)
+    width, aspect, rim = size_parts(tyre.size)
+    await db.execute(
+        'UPDATE tyres SET brand=?, model=?, size=?, price=?, offerPrice=?, quantity=?, category=?, image=?, specs=?, width=?, aspect=?, rim=? WHERE id=?',
+        (tyre.brand, tyre.model, tyre.size, tyre.price, tyre.offerPrice, tyre.quantity, tyre.category, tyre.image, specs_json, width, aspect, rim, tyre_id)
     )
-    conn.commit()
-    conn.close()
+    catalogue_cache.bump("tyres")
+    tyre.id = tyre_id
+    event_bus.publish("tyre.updated", tyre.dict())
     return tyre
 
+@router.patch("/tyres/{tyre_id}", response_model=TyreProduct)
+async def patch_tyre(tyre_id: int, patch: TyrePatch, current_user: Any = Depends(get_current_user)):
+    fields = patch.dict(exclude_unset=True)
+    row = await db.write(patch_row, 'tyres', tyre_id, column_values(fields))
+    if row is None:
+        raise HTTPException(status_code=404, detail="Tyre not found")
+    tyre = TyreProduct(**row)
+    if fields:
+        catalogue_cache.bump("tyres")
+        event_bus.publish("tyre.updated", tyre.dict())
+    return tyre
+
+@router.post("/tyres/bulk-edit", response_model=BulkEditResult)
+async def bulk_edit_tyres(edit: TyreBulkEdit, current_user: Any = Depends(get_current_user)):
+    """One UPDATE for every matching tyre, e.g. {"filter": {"brand": "Michelin", "rim": 18}, "offerPercentOff": 10}."""
+    clauses, params = filter_clauses(edit.filter.dict())
+    updated = await db.write(bulk_update, 'tyres', clauses, params, column_values(edit.changes.dict(exclude_unset=True)),
+                             price_expressions(edit.priceChangePercent, edit.offerPercentOff))
+    if updated:
+        catalogue_cache.bump("tyres")
+        event_bus.publish("tyres.bulk_edited", {"updated": updated})
+    return {"updated": updated}
+
 @router.delete("/tyres/{tyre_id}")
-def delete_tyre(tyre_id: int, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
-    conn.execute('DELETE FROM tyres WHERE id=?', (tyre_id,))
-    conn.commit()
-    conn.close()
+async def delete_tyre(tyre_id: int, current_user: Any = Depends(get_current_user)):
+    await db.execute('DELETE FROM tyres WHERE id=?', (tyre_id,))
+    catalogue_cache.bump("tyres")
+    event_bus.publish("tyre.deleted", {"id": tyre_id})
     return {"status": "success"}
 
 @router.put("/tyres/{tyre_id}/stock")
-def update_tyre_stock(tyre_id: int, update: dict, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
+async def update_tyre_stock(tyre_id: int, update: dict, current_user: Any = Depends(get_current_user)):
     delta = update.get('delta', 0)
-    conn.execute('UPDATE tyres SET quantity = MAX(0, quantity + ?) WHERE id=?', (delta, tyre_id))
-    conn.commit()
-    conn.close()
-    return {"status": "success"}
+    if stock_coalescer is not None:
+        quantity = await stock_coalescer.submit(tyre_id, delta)
+    else:
+        quantity = (await db.write(apply_stock_deltas, [(tyre_id, delta)])).get(tyre_id)
+        catalogue_cache.bump("tyres")
+        if quantity is not None:
+            event_bus.publish("tyre.stock", {"quantities": {tyre_id: quantity}})
+    return {"status": "success", "quantity": quantity}
+
+@router.post("/tyres/stock/batch")
+async def update_tyre_stock_batch(batch: StockBatch, current_user: Any = Depends(get_current_user)):
+    # One transaction (one fsync) for the whole stock-take instead of one per click
+    quantities = await db.write(apply_stock_deltas, [(a.id, a.delta) for a in batch.adjustments])
+    catalogue_cache.bump("tyres")
+    event_bus.publish("tyre.stock", {"quantities": quantities})
+    return {"status": "success", "quantities": quantities}
+
+@router.get("/admin/stats", response_model=InventoryStats)
+async def get_inventory_stats(current_user: Any = Depends(get_current_user)):
+    """Dashboard totals from the trigger-maintained summary in stats.py."""
+    return await db.read(inventory_summary)
+
+@router.post("/admin/events/ticket")
+async def admin_events_ticket(current_user: Any = Depends(get_current_user)):
+    """One-time ticket for opening the event stream, so the bearer token never goes in a URL."""
+    return {"ticket": create_stream_ticket(current_user["username"]), "expires_in": STREAM_TICKET_SECONDS}
+
+@router.get("/admin/events")
+async def admin_events(current_user: Any = Depends(get_stream_user)):
+    """Server-sent change feed (bookings, stock, cars, tyres) for admin dashboards."""
+    return StreamingResponse(
+        event_bus.stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def _bulk_format(fmt: Optional[str], filename: Optional[str]) -> str:
+    fmt = (fmt or (filename or "").rsplit(".", 1)[-1]).lower()
+    if fmt in ("jsonl", "ndjson"):
+        return "ndjson"
+    if fmt != "csv":
+        raise HTTPException(status_code=400, detail="Format must be csv or ndjson")
+    return fmt
+
+# Import and export stay sync on the connection pool: they stream a file
+# through many batches and would otherwise hold the single writer thread.
+@router.post("/tyres/import")
+def import_tyres(file: UploadFile = File(...), format: Optional[str] = None, conn: sqlite3.Connection = Depends(get_db), current_user: Any = Depends(get_current_user)):
+    fmt = _bulk_format(format, file.filename)
+    errors = ErrorReport()
+    inserted = updated = 0
+    batch: List[TyreProduct] = []
+    # The upload is spooled to disk by Starlette and read line by line, so a
+    # large price list never sits in memory; each batch is one transaction.
+    for tyre in validate_records(iter_records(file.file, fmt), errors):
+        batch.append(tyre)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            added, changed = upsert_batch(conn, batch)
+            conn.commit()
+            inserted, updated, batch = inserted + added, updated + changed, []
+    if batch:
+        added, changed = upsert_batch(conn, batch)
+        conn.commit()
+        inserted, updated = inserted + added, updated + changed
+    if inserted or updated:
+        catalogue_cache.bump("tyres")
+        event_bus.publish("tyres.imported", {"inserted": inserted, "updated": updated})
+    return {
+        "inserted": inserted,
+        "updated": updated,
+        "failed": errors.count,
+        "errors": errors.rows,
+    }
+
+@router.get("/tyres/export")
+def export_tyres(format: str = "csv", current_user: Any = Depends(get_current_user)):
+    fmt = _bulk_format(format, None)
+
+    media_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    filename = "tyres.csv" if fmt == "csv" else "tyres.ndjson"
+    return StreamingResponse(export_rows(fmt), media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+# Sync like the import: hashing and writing the file happen on the threadpool,
+# resizing is handed to the image worker processes.
+@router.post("/images", response_model=ImageUpload)
+def upload_image(file: UploadFile = File(...), current_user: Any = Depends(get_current_user)):
+    data = file.file.read(MAX_IMAGE_BYTES + 1)
+    try:
+        ext = check_image(data)
+    except ValueError as e:
+        raise HTTPException(status_code=413 if len(data) > MAX_IMAGE_BYTES else 415, detail=str(e))
+    digest, original = store_original(data, ext)
+    resized = schedule_variants(digest, original)
+    return {"key": image_key(digest), "url": image_url(digest, original), "widths": list(VARIANT_WIDTHS) if resized else []}
 
 @router.post("/brands")
-def add_brand(brand: TyreBrand, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
+async def add_brand(brand: TyreBrand, current_user: Any = Depends(get_current_user)):
     try:
-        conn.execute('INSERT INTO brands (name) VALUES (?)', (brand.name,))
-        conn.commit()
+        await db.execute('INSERT INTO brands (name) VALUES (?)', (brand.name,))
     except sqlite3.IntegrityError:
         pass
-    conn.close()
+    catalogue_cache.bump("brands")
     return brand
 
 @router.delete("/brands/{name}")
-def delete_brand(name: str, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
-    conn.execute('DELETE FROM brands WHERE name=?', (name,))
-    conn.commit()
-    conn.close()
+async def delete_brand(name: str, current_user: Any = Depends(get_current_user)):
+    await db.execute('DELETE FROM brands WHERE name=?', (name,))
+    catalogue_cache.bump("brands")
     return {"status": "success"}
 
 @router.post("/settings")
-def update_setting(update: SettingsUpdate, current_user: Any = Depends(get_current_user)):
-    conn = get_db()
+async def update_setting(update: SettingsUpdate, current_user: Any = Depends(get_current_user)):
     val_json = json.dumps(update.value)
-    conn.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?,?)', (update.key, val_json))
-    conn.commit()
-    conn.close()
+    await db.execute('INSERT OR REPLACE INTO settings (key, value) VALUES (?,?)', (update.key, val_json))
+    catalogue_cache.bump(f"settings:{update.key}")
     return {"status": "success"}
@@ -1,85 +1,401 @@
 
 import json
 import sqlite3
-from typing import List
-from fastapi import APIRouter, HTTPException, Depends
-from ..database import get_db
-from ..schemas import Car, ServiceItem, TyreProduct, Booking
+from datetime import date, timedelta
+from typing import List, Optional, Union
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from pydantic import TypeAdapter
+from ..bookings import (MAX_AVAILABILITY_DAYS, NEXT_VERSION_SQL, NOW_SQL, normalize_slot, load_capacity, capacity_for, check_capacity,
+                        remaining_capacity, booked_counts, slot_keys, slot_range)
+from ..async_db import db
+from ..booking_queue import booking_queue
+from ..cache import CachedBody, catalogue_cache
+from ..events import event_bus
+from ..images import FALLBACK_CACHE_CONTROL, IMMUTABLE_CACHE_CONTROL, resolve
+from ..pagination import keyset_page
+from ..responses import cached_response
+from ..schemas import Car, CarPage, ServiceItem, TyreProduct, TyrePage, TyreFitment, TyreBrand, Booking, BookingAvailability, SearchPage
+from ..search import KIND_BITS, match_expression, search_page
+from ..tyresize import parse_tyre_size, format_tyre_size, overall_diameter_mm
 
 router = APIRouter()
 
-@router.get("/cars", response_model=List[Car])
-def get_cars():
-    try:
-        conn = get_db()
-        rows = conn.execute('SELECT * FROM cars').fetchall()
-        conn.close()
-        res = []
-        for r in rows:
-            d = dict(r)
-            d['features'] = json.loads(d['features'])
-            d['sold'] = bool(d['sold'])
-            res.append(d)
-        return res
-    except Exception as e:
-        print(f"Error fetching cars: {e}")
-        raise HTTPException(status_code=500, detail="Database error")
+# --- Catalogue (served from catalogue_cache, rebuilt after admin writes) ---
+
+_cars_adapter = TypeAdapter(List[Car])
+_services_adapter = TypeAdapter(List[ServiceItem])
+_tyres_adapter = TypeAdapter(List[TyreProduct])
+_brands_adapter = TypeAdapter(List[TyreBrand])
+
+def _serialize(adapter: TypeAdapter, rows: list) -> bytes:
+    return adapter.dump_json(adapter.validate_python(rows))
+
+def _car_row(r) -> dict:
+    d = dict(r)
+    d['features'] = json.loads(d['features'])
+    d['sold'] = bool(d['sold'])
+    return d
+
+def _tyre_row(r) -> dict:
+    d = dict(r)
+    d['specs'] = json.loads(d['specs'])
+    return d
+
+def _build_cars(conn) -> bytes:
+    rows = conn.execute('SELECT * FROM cars').fetchall()
+    return _serialize(_cars_adapter, [_car_row(r) for r in rows])
+
+def _build_services(conn) -> bytes:
+    rows = conn.execute('SELECT * FROM services').fetchall()
+    return _serialize(_services_adapter, [dict(r) for r in rows])
+
+def _build_tyres(conn) -> bytes:
+    rows = conn.execute('SELECT * FROM tyres').fetchall()
+    return _serialize(_tyres_adapter, [_tyre_row(r) for r in rows])
+
+def _build_brands(conn) -> bytes:
+    rows = conn.execute('SELECT name FROM brands').fetchall()
+    return _serialize(_brands_adapter, [{"name": r["name"]} for r in rows])
+
+def _get_or_build(conn, key: str, build) -> CachedBody:
+    return catalogue_cache.get_or_build(key, lambda: build(conn))
+
+async def _cached_body(key: str, build) -> CachedBody:
+    # Hits are answered on the event loop; only a miss goes to a reader thread.
+    cached = catalogue_cache.get(key)
+    if cached is None:
+        cached = await db.read(_get_or_build, key, build)
+    return cached
+
+async def _cached_json(request: Request, key: str, build) -> Response:
+    return cached_response(request, await _cached_body(key, build))
+
+# sort name -> (column, descending)
+CAR_SORTS = {
+    "newest": ("id", True),
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+    "year_desc": ("year", True),
+    "mileage_asc": ("mileage", False),
+}
+TYRE_SORTS = {
+    "newest": ("id", True),
+    "price_asc": ("price", False),
+    "price_desc": ("price", True),
+    "stock_desc": ("quantity", True),
+}
+
+PAGE_SIZE = 24
+
+def _wants_page(limit: Optional[int], cursor: Optional[str], **filters) -> bool:
+    """/cars and /tyres return the full (cached) list unless ?limit= or ?cursor= asks for a page.
+
+    Other parameters (cache busters and the like) never change the response
+    shape; filters and sorts only exist on pages, so they need a limit.
+    """
+    if limit is not None or cursor is not None:
+        return True
+    used = [name for name, value in filters.items() if value is not None]
+    if used:
+        raise HTTPException(status_code=400, detail=f"{', '.join(used)} only apply to pages: add ?limit=")
+    return False
+
+def _price_filters(where: list, params: list, min_price: Optional[float], max_price: Optional[float]):
+    if min_price is not None:
+        where.append('price >= ?')
+        params.append(min_price)
+    if max_price is not None:
+        where.append('price <= ?')
+        params.append(max_price)
+
+@router.get("/cars", response_model=Union[List[Car], CarPage])
+async def get_cars(
+    request: Request,
+    brand: Optional[str] = None,
+    transmission: Optional[str] = None,
+    sold: Optional[bool] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+):
+    if not _wants_page(limit, cursor, brand=brand, transmission=transmission, sold=sold,
+                       min_price=min_price, max_price=max_price, sort=sort):
+        try:
+            return await _cached_json(request, "cars", _build_cars)
+        except Exception as e:
+            print(f"Error fetching cars: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+
+    sort = sort or "newest"
+    if sort not in CAR_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort '{sort}'")
+    where, params = [], []
+    if brand:
+        # Cars have no brand column; the make leads the model name ("Audi RS6").
+        # A range on model ("Audi " <= model < "Audi!") can use idx_cars_model.
+        where.append('model >= ? AND model < ?')
+        params.extend([f"{brand} ", f"{brand}!"])
+    if transmission:
+        where.append('transmission = ?')
+        params.append(transmission)
+    if sold is not None:
+        where.append('sold = ?')
+        params.append(int(sold))
+    _price_filters(where, params, min_price, max_price)
+
+    column, descending = CAR_SORTS[sort]
+    rows, next_cursor = await db.read(keyset_page, 'cars', where, params, column, descending, cursor, limit or PAGE_SIZE)
+    return {"items": [_car_row(r) for r in rows], "next_cursor": next_cursor}
 
 @router.get("/services", response_model=List[ServiceItem])
-def get_services():
+async def get_services(request: Request):
     try:
-        conn = get_db()
-        rows = conn.execute('SELECT * FROM services').fetchall()
-        conn.close()
-        return [dict(r) for r in rows]
+        return await _cached_json(request, "services", _build_services)
     except Exception as e:
         print(f"Error fetching services: {e}")
         return []
 
-@router.get("/tyres", response_model=List[TyreProduct])
-def get_tyres():
-    try:
-        conn = get_db()
-        rows = conn.execute('SELECT * FROM tyres').fetchall()
-        conn.close()
-        res = []
-        for r in rows:
-            d = dict(r)
-            d['specs'] = json.loads(d['specs'])
-            res.append(d)
-        return res
-    except sqlite3.OperationalError as e:
-        print(f"Database Table Error: {e}")
-        raise HTTPException(status_code=500, detail="Database structure error")
-    except Exception as e:
-        print(f"Error fetching tyres: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+@router.get("/tyres", response_model=Union[List[TyreProduct], TyrePage])
+async def get_tyres(
+    request: Request,
+    brand: Optional[str] = None,
+    category: Optional[str] = None,
+    in_stock: Optional[bool] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+):
+    if not _wants_page(limit, cursor, brand=brand, category=category, in_stock=in_stock,
+                       min_price=min_price, max_price=max_price, sort=sort):
+        try:
+            return await _cached_json(request, "tyres", _build_tyres)
+        except sqlite3.OperationalError as e:
+            print(f"Database Table Error: {e}")
+            raise HTTPException(status_code=500, detail="Database structure error")
+        except Exception as e:
+            print(f"Error fetching tyres: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/brands")
-def get_brands():
-    conn = get_db()
-    rows = conn.execute('SELECT * FROM brands').fetchall()
-    conn.close()
-    return [{"name": r["name"]} for r in rows]
+    sort = sort or "newest"
+    if sort not in TYRE_SORTS:
+        raise HTTPException(status_code=400, detail=f"Unknown sort '{sort}'")
+    where, params = [], []
+    if brand:
+        where.append('brand = ?')
+        params.append(brand)
+    if category:
+        where.append('category = ?')
+        params.append(category)
+    if in_stock is not None:
+        where.append('quantity > 0' if in_stock else 'quantity <= 0')
+    _price_filters(where, params, min_price, max_price)
 
-@router.get("/settings/{key}")
-def get_setting(key: str):
-    conn = get_db()
+    column, descending = TYRE_SORTS[sort]
+    rows, next_cursor = await db.read(keyset_page, 'tyres', where, params, column, descending, cursor, limit or PAGE_SIZE)
+    return {"items": [_tyre_row(r) for r in rows], "next_cursor": next_cursor}
+
+# Alternatives must keep the overall diameter within this fraction of the requested size.
+FITMENT_DIAMETER_TOLERANCE = 0.03
+
+def _fitment_rows(conn, width: int, aspect: int, rim: int, in_stock: bool, limit: int):
+    stock_clause = ' AND quantity > 0' if in_stock else ''
+    target = overall_diameter_mm(width, aspect, rim)
+    diameter_sql = '(rim * 25.4 + 2 * width * aspect / 100.0)'
+    exact = conn.execute(
+        'SELECT * FROM tyres WHERE rim=? AND width=? AND aspect=?' + stock_clause + ' ORDER BY price, id LIMIT ?',
+        (rim, width, aspect, limit)
+    ).fetchall()
+    # Plus/minus one rim size and +/-20mm width bound the index range scan;
+    # the diameter check then keeps speedometer error within tolerance.
+    alternatives = conn.execute(
+        f'SELECT * FROM tyres WHERE rim BETWEEN ? AND ? AND width BETWEEN ? AND ?'
+        f' AND NOT (width=? AND aspect=? AND rim=?)'
+        f' AND ABS({diameter_sql} - ?) <= ?' + stock_clause +
+        f' ORDER BY ABS({diameter_sql} - ?), price, id LIMIT ?',
+        (rim - 1, rim + 1, width - 20, width + 20, width, aspect, rim,
+         target, target * FITMENT_DIAMETER_TOLERANCE, target, limit)
+    ).fetchall()
+    return exact, alternatives
+
+@router.get("/tyres/fitment", response_model=TyreFitment)
+async def get_tyre_fitment(
+    size: Optional[str] = None,
+    width: Optional[int] = None,
+    aspect: Optional[int] = None,
+    rim: Optional[int] = None,
+    in_stock: bool = False,
+    limit: int = Query(20, ge=1, le=100),
+):
+    if size:
+        parsed = parse_tyre_size(size)
+        if not parsed:
+            raise HTTPException(status_code=400, detail=f"Unrecognised tyre size '{size}'")
+        width, aspect, rim = parsed
+    if width is None or aspect is None or rim is None:
+        raise HTTPException(status_code=400, detail="Provide size or width, aspect and rim")
+
+    exact, alternatives = await db.read(_fitment_rows, width, aspect, rim, in_stock, limit)
+    return {
+        "size": format_tyre_size(width, aspect, rim),
+        "exact": [_tyre_row(r) for r in exact],
+        "alternatives": [_tyre_row(r) for r in alternatives],
+    }
+
+# --- Search ---
+
+def _search(conn, expression: str, kind: Optional[str], cursor: Optional[str], limit: int):
+    hits, next_cursor = search_page(conn, expression, kind, cursor, limit)
+    rows = {}
+    for name, table, to_dict in (("car", "cars", _car_row), ("tyre", "tyres", _tyre_row)):
+        ids = [item_id for hit_kind, item_id, _ in hits if hit_kind == name]
+        if ids:
+            placeholders = ','.join('?' * len(ids))
+            for r in conn.execute(f'SELECT * FROM {table} WHERE id IN ({placeholders})', ids):
+                rows[(name, r['id'])] = to_dict(r)
+    items = [{"kind": hit_kind, "score": -rank, hit_kind: rows[(hit_kind, item_id)]}
+             for hit_kind, item_id, rank in hits if (hit_kind, item_id) in rows]
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/search", response_model=SearchPage)
+async def search(
+    q: str = Query(..., max_length=200),
+    kind: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+):
+    """Ranked prefix search over cars and tyres, e.g. "Pirelli 19 inch" or "BMW automatic"."""
+    if kind is not None and kind not in KIND_BITS:
+        raise HTTPException(status_code=400, detail=f"Unknown kind '{kind}'")
+    expression = match_expression(q)
+    if expression is None:
+        return {"items": [], "next_cursor": None}
+    return await db.read(_search, expression, kind, cursor, limit)
+
+@router.get("/brands", response_model=List[TyreBrand])
+async def get_brands(request: Request):
+    return await _cached_json(request, "brands", _build_brands)
+
+# --- Images (content-addressed, see images.py) ---
+
+@router.get("/images/{digest}/{name}")
+async def get_image(digest: str, name: str):
+    found = resolve(digest, name)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    path, media_type, immutable = found
+    return FileResponse(path, media_type=media_type,
+                        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else FALLBACK_CACHE_CONTROL})
+
+# Settings read on every page load; other keys are looked up directly.
+CACHED_SETTINGS = ("banner", "companyInfo")
+
+def _build_setting(conn, key: str) -> bytes:
     row = conn.execute('SELECT value FROM settings WHERE key=?', (key,)).fetchone()
-    conn.close()
-    if row:
-        return json.loads(row['value'])
-    return {}
+    # Values are stored as JSON text already, so they go out verbatim.
+    return row['value'].encode() if row else b'{}'
 
-@router.post("/bookings", response_model=Booking)
-def create_booking(booking: Booking):
-    # Public can create bookings
-    conn = get_db()
+async def _setting_body(key: str) -> CachedBody:
+    if key in CACHED_SETTINGS:
+        return await _cached_body(f"settings:{key}", lambda conn: _build_setting(conn, key))
+    return CachedBody(await db.read(_build_setting, key))
+
+@router.get("/settings/{key}")
+async def get_setting(key: str, request: Request):
+    return cached_response(request, await _setting_body(key))
+
+CATALOGUE_BUILDERS = {
+    "cars": _build_cars,
+    "services": _build_services,
+    "tyres": _build_tyres,
+    "brands": _build_brands,
+}
+
+# (part etags, stitched body) for the most recent bootstrap document
+_bootstrap_memo = ((), None)
+
+@router.get("/bootstrap")
+async def get_bootstrap(request: Request):
+    """Everything the public site needs on first load, in one response."""
+    global _bootstrap_memo
+    # Stitched from the same cached bodies as the individual endpoints; nothing is re-serialized.
+    try:
+        parts = [(key, await _cached_body(key, build)) for key, build in CATALOGUE_BUILDERS.items()]
+        parts += [(key, await _setting_body(key)) for key in CACHED_SETTINGS]
+    except Exception as e:
+        print(f"Error building bootstrap payload: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+    etags = tuple(part.etag for _, part in parts)
+    memo_etags, cached = _bootstrap_memo
+    if cached is None or memo_etags != etags:
+        body = b'{' + b','.join(b'"%s":%s' % (key.encode(), part.body) for key, part in parts) + b'}'
+        cached = CachedBody(body)
+        _bootstrap_memo = (etags, cached)
+    return cached_response(request, cached)
+
+def _insert_booking(conn, booking: Booking):
+    # Take the write lock before counting so concurrent submissions (from any
+    # worker) cannot both see the last free place.
+    conn.execute('BEGIN IMMEDIATE')
+    check_capacity(remaining_capacity(conn, booking.date, booking.serviceType))
     cur = conn.execute(
-        'INSERT INTO bookings (customerName, contact, serviceType, date, status, notes) VALUES (?,?,?,?,?,?)',
+        'INSERT INTO bookings (customerName, contact, serviceType, date, status, notes, created_at, updated_at, version) '
+        f'VALUES (?,?,?,?,?,?,{NOW_SQL},{NOW_SQL},{NEXT_VERSION_SQL})',
         (booking.customerName, booking.contact, booking.serviceType, booking.date, booking.status, booking.notes)
     )
-    conn.commit()
-    booking.id = cur.lastrowid
-    conn.close()
+    return conn.execute('SELECT id, created_at, updated_at, version FROM bookings WHERE id=?', (cur.lastrowid,)).fetchone()
+
+@router.post("/bookings", response_model=Booking)
+async def create_booking(booking: Booking):
+    # Public can create bookings
+    slot = normalize_slot(booking.date)
+    if slot is None:
+        raise HTTPException(status_code=400, detail="Invalid booking date")
+    booking.date = slot
+
+    if booking_queue is not None:
+        return await booking_queue.submit(booking)
+    row = await db.write(_insert_booking, booking)
+    booking.id = row['id']
+    booking.created_at, booking.updated_at, booking.version = row['created_at'], row['updated_at'], row['version']
+    event_bus.publish("booking.created", booking.dict())
     return booking
+
+def _availability_inputs(conn, date_from: date, date_to: date, service: Optional[str]):
+    config = load_capacity(conn)
+    if service:
+        services = [service]
+    else:
+        services = [r['name'] for r in conn.execute('SELECT name FROM services ORDER BY id')]
+    counts = booked_counts(conn, *slot_range(date_from, date_to), service=service)
+    return config, services, counts
+
+@router.get("/bookings/availability", response_model=BookingAvailability)
+async def get_booking_availability(
+    date_from: date = Query(..., alias="from"),
+    date_to: date = Query(..., alias="to"),
+    service: Optional[str] = None,
+):
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (date_to - date_from).days >= MAX_AVAILABILITY_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_AVAILABILITY_DAYS} days")
+
+    config, services, counts = await db.read(_availability_inputs, date_from, date_to, service)
+
+    slots = []
+    day = date_from
+    while day <= date_to:
+        for key in slot_keys(config, day):
+            for name in services:
+                capacity = capacity_for(config, name)
+                booked = counts.get((key, name), 0)
+                slots.append({"slot": key, "service": name, "capacity": capacity, "booked": booked,
+                              "available": None if capacity is None else max(0, capacity - booked)})
+        day += timedelta(days=1)
+    return {"from": date_from, "to": date_to, "slots": slots}
@@ -1,6 +1,7 @@
 
+from datetime import date
 from typing import List, Optional, Any, Dict
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class Car(BaseModel):
     id: Optional[int] = None
@@ -28,6 +29,30 @@ class Booking(BaseModel):
     date: str
     status: str = "Pending"
     notes: Optional[str] = None
+    # Maintained by the server; ignored on input
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    version: Optional[int] = None
+
+class BookingPage(BaseModel):
+    items: List[Booking]
+    next_cursor: Optional[str] = None
+    # High-water change version; pass back as ?since= to fetch only later changes
+    version: int
+
+class SlotAvailability(BaseModel):
+    slot: str
+    service: str
+    capacity: Optional[int] = None  # None: no cap on this service
+    booked: int
+    available: Optional[int] = None
+
+class BookingAvailability(BaseModel):
+    model_config = {"populate_by_name": True}
+
+    date_from: date = Field(alias="from")
+    date_to: date = Field(alias="to")
+    slots: List[SlotAvailability]
 
 class TyreSpecs(BaseModel):
     fuel: str
@@ -46,6 +71,127 @@ class TyreProduct(BaseModel):
     image: str
     specs: TyreSpecs
 
+# --- Partial and bulk edits (only the fields sent are written) ---
+
+class CarPatch(BaseModel):
+    model: Optional[str] = None
+    year: Optional[int] = None
+    engine: Optional[str] = None
+    price: Optional[float] = None
+    image: Optional[str] = None
+    sold: Optional[bool] = None
+    mileage: Optional[int] = None
+    transmission: Optional[str] = None
+    description: Optional[str] = None
+    features: Optional[List[str]] = None
+
+class TyrePatch(BaseModel):
+    brand: Optional[str] = None
+    model: Optional[str] = None
+    size: Optional[str] = None
+    price: Optional[float] = None
+    offerPrice: Optional[float] = None
+    quantity: Optional[int] = None
+    category: Optional[str] = None
+    image: Optional[str] = None
+    specs: Optional[TyreSpecs] = None
+
+class ServicePatch(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+
+class CarFilter(BaseModel):
+    ids: Optional[List[int]] = Field(None, max_length=1000)
+    sold: Optional[bool] = None
+    year: Optional[int] = None
+    transmission: Optional[str] = None
+
+class TyreFilter(BaseModel):
+    ids: Optional[List[int]] = Field(None, max_length=1000)
+    brand: Optional[str] = None
+    category: Optional[str] = None
+    width: Optional[int] = None
+    aspect: Optional[int] = None
+    rim: Optional[int] = None
+
+class ServiceFilter(BaseModel):
+    ids: List[int] = Field(..., max_length=1000)
+
+class CarBulkEdit(BaseModel):
+    filter: CarFilter
+    changes: CarPatch = CarPatch()
+    priceChangePercent: Optional[float] = Field(None, gt=-100)
+
+class TyreBulkEdit(BaseModel):
+    """e.g. {"filter": {"brand": "Michelin", "rim": 18}, "offerPercentOff": 10}"""
+    filter: TyreFilter
+    changes: TyrePatch = TyrePatch()
+    priceChangePercent: Optional[float] = Field(None, gt=-100)
+    offerPercentOff: Optional[float] = Field(None, gt=0, lt=100)
+
+class ServiceBulkEdit(BaseModel):
+    filter: ServiceFilter
+    changes: ServicePatch
+
+class BulkEditResult(BaseModel):
+    updated: int
+
+class CarPage(BaseModel):
+    items: List[Car]
+    next_cursor: Optional[str] = None
+
+class TyrePage(BaseModel):
+    items: List[TyreProduct]
+    next_cursor: Optional[str] = None
+
+class StockAdjustment(BaseModel):
+    id: int
+    delta: int
+
+class StockBatch(BaseModel):
+    adjustments: List[StockAdjustment]
+
+class TyreFitment(BaseModel):
+    size: str
+    exact: List[TyreProduct]
+    alternatives: List[TyreProduct]
+
+class SearchHit(BaseModel):
+    kind: str
+    score: float
+    car: Optional[Car] = None
+    tyre: Optional[TyreProduct] = None
+
+class SearchPage(BaseModel):
+    items: List[SearchHit]
+    next_cursor: Optional[str] = None
+
+class TyreStats(BaseModel):
+    name: str  # brand or category; empty for the overall totals
+    skus: int
+    units: int
+    stockValue: float  # quantity x offer price (or price)
+    lowStock: int
+    outOfStock: int
+
+class CarStats(BaseModel):
+    total: int
+    unsold: int
+    sold: int
+    unsoldValue: float
+
+class InventoryStats(BaseModel):
+    tyres: TyreStats
+    brands: List[TyreStats]
+    categories: List[TyreStats]
+    cars: CarStats
+    lowStockThreshold: int
+
+class ImageUpload(BaseModel):
+    key: str  # store this in Car.image / TyreProduct.image
+    url: str  # the original as uploaded
+    widths: List[int]  # variants at /api/images/<hash>/<width>.webp; empty without Pillow
+
 class TyreBrand(BaseModel):
     name: str
 
@@ -0,0 +1,85 @@
+import re
+from typing import List, Optional, Tuple
+from .pagination import decode_cursor, encode_cursor
+
+# One FTS5 index covers both catalogues. rowid = id * 2 + kind bit, so a
+# change to a car or tyre touches its index row by rowid, and a single
+# MATCH ranks cars and tyres together.
+KIND_BITS = {"car": 0, "tyre": 1}
+# Column weights for bm25: title (car model / tyre brand + model), body
+TITLE_WEIGHT, BODY_WEIGHT = 2.0, 1.0
+MAX_TERMS = 8
+# Dropped from queries so "Pirelli 19 inch" matches on the rim size
+NOISE_WORDS = {"inch", "inches", "in"}
+
+_CAR_DOC = ("{r}.id * 2", "COALESCE({r}.model, '')",
+            "COALESCE({r}.engine, '') || ' ' || COALESCE({r}.transmission, '') || ' ' || COALESCE({r}.year, '')"
+            " || ' ' || COALESCE({r}.description, '') || ' ' || COALESCE({r}.features, '')")
+# Parsed sizes are indexed as "225 40 19 R19" whatever the stored spelling
+# ("225/40R19", "225/40 R19"); match_expression splits queries the same way.
+_TYRE_DOC = ("{r}.id * 2 + 1", "COALESCE({r}.brand, '') || ' ' || COALESCE({r}.model, '')",
+             "COALESCE({r}.size, '') || ' ' || COALESCE({r}.category, '')"
+             " || COALESCE(' ' || {r}.width || ' ' || {r}.aspect || ' ' || {r}.rim || ' R' || {r}.rim, '')")
+
+def _insert_sql(doc, row: str) -> str:
+    rowid, title, body = (part.format(r=row) for part in doc)
+    return f"INSERT INTO search_index (rowid, title, body) VALUES ({rowid}, {title}, {body})"
+
+def _triggers(table: str, doc, columns: str) -> List[str]:
+    delete = f"DELETE FROM search_index WHERE rowid = {doc[0].format(r='old')}"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN {_insert_sql(doc, 'new')}; END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN {delete}; END",
+        # Only searchable columns, so stock and price changes leave the index alone
+        f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE OF {columns} ON {table} "
+        f"BEGIN {delete}; {_insert_sql(doc, 'new')}; END",
+    ]
+
+def rebuild_search_index(c):
+    c.execute('DELETE FROM search_index')
+    for table, doc in (("cars", _CAR_DOC), ("tyres", _TYRE_DOC)):
+        rowid, title, body = (part.format(r=table) for part in doc)
+        c.execute(f"INSERT INTO search_index (rowid, title, body) SELECT {rowid}, {title}, {body} FROM {table}")
+
+def ensure_search_index(c):
+    """Create the search index and its sync triggers; indexes existing rows the first time."""
+    exists = c.execute("SELECT 1 FROM sqlite_master WHERE name='search_index'").fetchone()
+    if not exists:
+        c.execute("CREATE VIRTUAL TABLE search_index USING fts5(title, body, tokenize='unicode61 remove_diacritics 2')")
+        c.execute(f"INSERT INTO search_index (search_index, rank) VALUES ('rank', 'bm25({TITLE_WEIGHT}, {BODY_WEIGHT})')")
+    for sql in (_triggers("cars", _CAR_DOC, "model, engine, transmission, year, description, features") +
+                _triggers("tyres", _TYRE_DOC, "brand, model, size, category, width, aspect, rim")):
+        c.execute(sql)
+    if not exists:
+        print("Building search index...")
+        rebuild_search_index(c)
+
+def match_expression(q: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, each as a prefix."""
+    q = re.sub(r"(\d)r(\d)", r"\1 r\2", q.lower())
+    terms = [t for t in re.findall(r"\w+", q) if t not in NOISE_WORDS]
+    if not terms:
+        return None
+    return " ".join(f'"{t}"*' for t in terms[:MAX_TERMS])
+
+def search_page(conn, expression: str, kind: Optional[str], cursor: Optional[str], limit: int):
+    """Returns ([(kind, id, rank)], next_cursor), best match first."""
+    clauses, args = ["search_index MATCH ?"], [expression]
+    if kind:
+        clauses.append("rowid % 2 = ?")
+        args.append(KIND_BITS[kind])
+    if cursor:
+        rank, last_rowid = decode_cursor(cursor)
+        clauses.append("(rank > ? OR (rank = ? AND rowid > ?))")
+        args.extend([rank, rank, last_rowid])
+    rows = conn.execute(
+        "SELECT rowid, rank FROM search_index WHERE " + " AND ".join(clauses) + " ORDER BY rank, rowid LIMIT ?",
+        args + [limit + 1]
+    ).fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["rank"], rows[-1]["rowid"])
+    hits: List[Tuple[str, int, float]] = [("tyre" if r["rowid"] % 2 else "car", r["rowid"] // 2, r["rank"]) for r in rows]
+    return hits, next_cursor
@@ -0,0 +1,130 @@
+"""JWT signing keys shared by every worker process.
+
+Keys come from ALEXIS_JWT_SECRET (a single key) or from a JSON key file
+(ALEXIS_JWT_KEY_FILE, default jwt_keys.json) shaped like
+{"active": "<kid>", "keys": {"<kid>": "<secret>", ...}}. Tokens carry the
+signing kid in their header, so rotating only changes "active" and older
+keys keep verifying until they are pruned.
+
+    python -m backend.signing_keys rotate
+"""
+import json
+import os
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+KEY_FILE = os.environ.get("ALEXIS_JWT_KEY_FILE", "jwt_keys.json")
+# How often a running worker re-checks the key file for a rotation
+RELOAD_INTERVAL_SECONDS = 10
+# Active key plus this many previous keys stay valid after a rotation
+RETAINED_KEYS = 2
+
+def _new_kid() -> str:
+    return time.strftime("%Y%m%d%H%M%S") + "-" + secrets.token_hex(2)
+
+def _write_atomic(path: str, data: dict, exclusive: bool = False):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".jwt_keys.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.chmod(tmp, 0o600)
+        if exclusive:
+            # link() fails if another worker created the file first
+            os.link(tmp, path)
+        else:
+            os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+
+class KeyRing:
+    def __init__(self, key_file: str = KEY_FILE):
+        self.key_file = key_file
+        self._lock = threading.Lock()
+        self._active: str = ""
+        self._keys: Dict[str, str] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._from_env = False
+
+    def load(self):
+        secret = os.environ.get("ALEXIS_JWT_SECRET")
+        if secret:
+            self._active, self._keys, self._from_env = "env", {"env": secret}, True
+            return
+        if not os.path.exists(self.key_file):
+            kid = _new_kid()
+            try:
+                _write_atomic(self.key_file, {"active": kid, "keys": {kid: secrets.token_hex(32)}}, exclusive=True)
+                print(f"Generated JWT signing key file {self.key_file}")
+            except FileExistsError:
+                pass
+        self._read_file()
+
+    def _read_file(self):
+        with open(self.key_file) as f:
+            data = json.load(f)
+        self._keys = dict(data["keys"])
+        self._active = data["active"]
+        self._mtime = os.path.getmtime(self.key_file)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if self._from_env or now - self._checked_at < RELOAD_INTERVAL_SECONDS:
+            return
+        with self._lock:
+            self._checked_at = now
+            try:
+                if os.path.getmtime(self.key_file) != self._mtime:
+                    self._read_file()
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Keeping current JWT keys, could not reload {self.key_file}: {e}")
+
+    def signing_key(self) -> Tuple[str, str]:
+        if not self._keys:
+            with self._lock:
+                if not self._keys:
+                    self.load()
+        self._maybe_reload()
+        return self._active, self._keys[self._active]
+
+    def verification_key(self, kid: Optional[str]) -> Optional[str]:
+        active, active_key = self.signing_key()
+        if kid is None:
+            return active_key
+        key = self._keys.get(kid)
+        if key is None:
+            # A sibling worker may have rotated moments ago
+            self._checked_at = 0.0
+            self._maybe_reload()
+            key = self._keys.get(kid)
+        return key
+
+def rotate(key_file: str = KEY_FILE) -> str:
+    """Add a fresh active key, keeping the previous RETAINED_KEYS for verification."""
+    data = {"active": "", "keys": {}}
+    if os.path.exists(key_file):
+        with open(key_file) as f:
+            data = json.load(f)
+    kid = _new_kid()
+    keys = dict(data["keys"])
+    keys[kid] = secrets.token_hex(32)
+    # The file keeps keys in the order they were added (kid timestamps only
+    # have one-second resolution, so sorting could drop the new key)
+    retained = list(keys)[-(RETAINED_KEYS + 1):]
+    _write_atomic(key_file, {"active": kid, "keys": {k: keys[k] for k in retained}})
+    return kid
+
+keyring = KeyRing()
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["rotate"]:
+        print(f"Active signing key is now {rotate()}")
+    else:
+        print("usage: python -m backend.signing_keys rotate")
+        sys.exit(2)
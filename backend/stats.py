@@ -0,0 +1,126 @@
+import sys
+from typing import List
+
+# Inventory totals for the admin dashboard, kept in inventory_stats by
+# triggers on cars and tyres. Every write path (single edits, the stock
+# coalescer, bulk import) adjusts the affected rows in its own transaction,
+# so reading the summary never scans the catalogue.
+#
+#   scope          name               items  units  value              low_stock  out_of_stock
+#   tyres          ''                 SKUs   stock  stock x sell price  ...        ...
+#   tyre_brand     brand              per-brand breakdown of the above
+#   tyre_category  category           per-category breakdown
+#   cars           'sold' / 'unsold'  cars   cars   sum of prices       0          0
+
+# 1-4 left (less than a set of four) counts as low stock. It is baked into
+# the triggers: after changing it, run `python -m backend.stats rebuild`.
+LOW_STOCK_THRESHOLD = 4
+
+_TRIGGERS = ("tyres_stats_ai", "tyres_stats_ad", "tyres_stats_au", "cars_stats_ai", "cars_stats_ad", "cars_stats_au")
+
+def _tyre_measures(r: str) -> List[str]:
+    """items, units, value, low_stock, out_of_stock contributed by one tyre row."""
+    qty = f"COALESCE({r}.quantity, 0)"
+    return ["1", qty, f"{qty} * COALESCE({r}.offerPrice, {r}.price, 0)",
+            f"({qty} > 0 AND {qty} <= {LOW_STOCK_THRESHOLD})", f"({qty} <= 0)"]
+
+def _car_measures(r: str) -> List[str]:
+    return ["1", "1", f"COALESCE({r}.price, 0)", "0", "0"]
+
+def _tyre_scopes(r: str):
+    return [("'tyres'", "''"), ("'tyre_brand'", f"COALESCE({r}.brand, '')"), ("'tyre_category'", f"COALESCE({r}.category, '')")]
+
+def _car_scopes(r: str):
+    return [("'cars'", f"CASE WHEN {r}.sold THEN 'sold' ELSE 'unsold' END")]
+
+def _apply_sql(scopes, measures, sign: str) -> List[str]:
+    values = ", ".join(f"{sign}({m})" for m in measures)
+    return [
+        f"INSERT INTO inventory_stats (scope, name, items, units, value, low_stock, out_of_stock) "
+        f"VALUES ({scope}, {name}, {values}) ON CONFLICT (scope, name) DO UPDATE SET "
+        "items = items + excluded.items, units = units + excluded.units, value = value + excluded.value, "
+        "low_stock = low_stock + excluded.low_stock, out_of_stock = out_of_stock + excluded.out_of_stock"
+        for scope, name in scopes
+    ]
+
+# Breakdown rows go once their last item does; the tyre totals row stays.
+_PRUNE_SQL = "DELETE FROM inventory_stats WHERE items = 0 AND scope != 'tyres'"
+
+def _triggers(table: str, scopes, measures, columns: str) -> List[str]:
+    add = "; ".join(_apply_sql(scopes("new"), measures("new"), "+"))
+    remove = "; ".join(_apply_sql(scopes("old"), measures("old"), "-") + [_PRUNE_SQL])
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_stats_ai AFTER INSERT ON {table} BEGIN {add}; END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_stats_ad AFTER DELETE ON {table} BEGIN {remove}; END",
+        # Only the columns the summary depends on; description edits cost nothing
+        f"CREATE TRIGGER IF NOT EXISTS {table}_stats_au AFTER UPDATE OF {columns} ON {table} "
+        f"BEGIN {remove}; {add}; END",
+    ]
+
+def _rebuild_sql() -> List[str]:
+    tyre = _tyre_measures("tyres")
+    tyre_sums = ", ".join(f"TOTAL({m})" for m in tyre)
+    car_sums = ", ".join(f"TOTAL({m})" for m in _car_measures("cars"))
+    sold = _car_scopes("cars")[0][1]
+    return [
+        f"INSERT INTO inventory_stats SELECT 'tyres', '', {tyre_sums} FROM tyres",
+        f"INSERT INTO inventory_stats SELECT 'tyre_brand', COALESCE(brand, ''), {tyre_sums} FROM tyres GROUP BY 2",
+        f"INSERT INTO inventory_stats SELECT 'tyre_category', COALESCE(category, ''), {tyre_sums} FROM tyres GROUP BY 2",
+        f"INSERT INTO inventory_stats SELECT 'cars', {sold}, {car_sums} FROM cars GROUP BY 2",
+    ]
+
+def rebuild_inventory_stats(c):
+    """Recompute the summary from scratch and recreate its triggers (recovery, threshold changes)."""
+    for name in _TRIGGERS:
+        c.execute(f"DROP TRIGGER IF EXISTS {name}")
+    c.execute("DELETE FROM inventory_stats")
+    for sql in _rebuild_sql():
+        c.execute(sql)
+    for sql in (_triggers("tyres", _tyre_scopes, _tyre_measures, "brand, category, quantity, price, offerPrice") +
+                _triggers("cars", _car_scopes, _car_measures, "sold, price")):
+        c.execute(sql)
+
+def ensure_inventory_stats(c):
+    """Create the summary table and its triggers, filling it from the current inventory."""
+    c.execute('''CREATE TABLE IF NOT EXISTS inventory_stats (
+        scope TEXT NOT NULL, name TEXT NOT NULL,
+        items INTEGER NOT NULL DEFAULT 0, units INTEGER NOT NULL DEFAULT 0, value REAL NOT NULL DEFAULT 0,
+        low_stock INTEGER NOT NULL DEFAULT 0, out_of_stock INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (scope, name)
+    ) WITHOUT ROWID''')
+    print("Building inventory stats...")
+    rebuild_inventory_stats(c)
+
+def _tyre_stats(r) -> dict:
+    return {"name": r["name"], "skus": r["items"], "units": r["units"], "stockValue": round(r["value"], 2),
+            "lowStock": r["low_stock"], "outOfStock": r["out_of_stock"]}
+
+def inventory_summary(conn) -> dict:
+    rows = conn.execute("SELECT * FROM inventory_stats ORDER BY scope, name").fetchall()
+    scoped = {}
+    for r in rows:
+        scoped.setdefault(r["scope"], []).append(r)
+    tyres = scoped.get("tyres") or [{"name": "", "items": 0, "units": 0, "value": 0.0, "low_stock": 0, "out_of_stock": 0}]
+    cars = {r["name"]: r for r in scoped.get("cars", [])}
+    count = lambda name: cars[name]["items"] if name in cars else 0
+    return {
+        "tyres": _tyre_stats(tyres[0]),
+        "brands": [_tyre_stats(r) for r in scoped.get("tyre_brand", [])],
+        "categories": [_tyre_stats(r) for r in scoped.get("tyre_category", [])],
+        "cars": {"total": count("sold") + count("unsold"), "unsold": count("unsold"), "sold": count("sold"),
+                 "unsoldValue": round(cars["unsold"]["value"], 2) if "unsold" in cars else 0.0},
+        "lowStockThreshold": LOW_STOCK_THRESHOLD,
+    }
+
+if __name__ == "__main__":
+    from backend.database import connect
+    if sys.argv[1:] == ["rebuild"]:
+        conn = connect()
+        conn.execute("BEGIN IMMEDIATE")
+        rebuild_inventory_stats(conn)
+        conn.commit()
+        conn.close()
+        print("Inventory stats rebuilt")
+    else:
+        print("usage: python -m backend.stats rebuild")
+        sys.exit(2)
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Future
+from typing import Dict, Iterable, Optional, Tuple
+from .cache import catalogue_cache
+from .database import pooled_connection
+from .events import event_bus
+
+# Window (ms) for merging rapid /tyres/{id}/stock deltas into one UPDATE per SKU; 0 disables.
+STOCK_COALESCE_MS = int(os.environ.get("ALEXIS_STOCK_COALESCE_MS", "0"))
+
+def apply_stock_deltas(conn, adjustments: Iterable[Tuple[int, int]]) -> Dict[int, int]:
+    """Apply (tyre_id, delta) pairs in order in the caller's transaction.
+
+    Each pair clamps at zero exactly like a single /stock call would.
+    Returns the resulting quantity for every tyre that exists.
+    """
+    adjustments = list(adjustments)
+    conn.executemany('UPDATE tyres SET quantity = MAX(0, quantity + ?) WHERE id=?', [(delta, tyre_id) for tyre_id, delta in adjustments])
+    ids = sorted({tyre_id for tyre_id, _ in adjustments})
+    if not ids:
+        return {}
+    placeholders = ','.join('?' * len(ids))
+    rows = conn.execute(f'SELECT id, quantity FROM tyres WHERE id IN ({placeholders})', ids).fetchall()
+    return {r['id']: r['quantity'] for r in rows}
+
+class _PendingFlush:
+    def __init__(self):
+        self.deltas: Dict[int, int] = {}
+        self.done: Future = Future()
+
+class StockCoalescer:
+    """Merges deltas per tyre for a short window and writes them in one transaction.
+
+    Callers wait until the flush containing their delta has committed, so
+    the response still reflects durable state. Because deltas are summed
+    before clamping, +/- bursts that would dip below zero clamp once.
+    """
+
+    def __init__(self, window_ms: int):
+        self.window = window_ms / 1000.0
+        self._lock = threading.Lock()
+        self._pending = _PendingFlush()
+        self._timer: Optional[threading.Timer] = None
+
+    async def submit(self, tyre_id: int, delta: int) -> Optional[int]:
+        with self._lock:
+            pending = self._pending
+            pending.deltas[tyre_id] = pending.deltas.get(tyre_id, 0) + delta
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        quantities = await asyncio.wrap_future(pending.done)
+        return quantities.get(tyre_id)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, _PendingFlush()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not pending.deltas:
+            pending.done.set_result({})
+            return
+        try:
+            with pooled_connection() as conn:
+                quantities = apply_stock_deltas(conn, pending.deltas.items())
+                conn.commit()
+        except Exception as e:
+            print(f"Error flushing coalesced stock deltas: {e}")
+            pending.done.set_exception(e)
+            return
+        catalogue_cache.bump("tyres")
+        event_bus.publish("tyre.stock", {"quantities": quantities})
+        pending.done.set_result(quantities)
+
+stock_coalescer: Optional[StockCoalescer] = StockCoalescer(STOCK_COALESCE_MS) if STOCK_COALESCE_MS > 0 else None
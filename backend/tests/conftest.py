@@ -0,0 +1,82 @@
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Optional
+import pytest
+from backend.database import connect, init_db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def db_dir(tmp_path, monkeypatch):
+    """A fresh, migrated and seeded alexis.db in the working directory."""
+    monkeypatch.chdir(tmp_path)
+    init_db(lambda password: "test-hash")
+    return tmp_path
+
+@pytest.fixture
+def conn(db_dir):
+    c = connect()
+    yield c
+    c.close()
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """TestClient for the app running against a fresh database in a temp directory."""
+    from fastapi.testclient import TestClient
+    from backend.cache import catalogue_cache
+    from backend.main import app
+    monkeypatch.chdir(tmp_path)
+    catalogue_cache.clear()
+    with TestClient(app) as c:
+        yield c
+
+@pytest.fixture
+def live_server(tmp_path):
+    """Start `python backend/main.py` on a free port in a temp directory; returns (process, port)."""
+    procs = []
+
+    def start(**env):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        proc = subprocess.Popen([sys.executable, os.path.join(ROOT, "backend", "main.py"), "--host", "127.0.0.1", "--port", str(port)],
+                                cwd=tmp_path, env=dict(os.environ, PYTHONPATH=ROOT, **env),
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        procs.append(proc)
+        deadline = time.time() + 60
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=1).close()
+                return proc, port
+            except OSError:
+                if proc.poll() is not None or time.time() > deadline:
+                    proc.kill()
+                    pytest.fail("server did not start:\n" + proc.stdout.read().decode(errors="replace"))
+                time.sleep(0.2)
+
+    yield start
+    for proc in procs:
+        if proc.poll() is None:
+            proc.kill()
+        proc.wait()
+        proc.stdout.close()
+
+def request(port: int, method: str, path: str, body=None, token: Optional[str] = None, timeout: float = 10):
+    """One JSON request against a live server; returns (status, decoded body)."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    conn.close()
+    return response.status, json.loads(data) if data else None
+
+def login(port: int) -> str:
+    return request(port, "POST", "/api/login", {"username": "admin", "password": "password"})[1]["access_token"]
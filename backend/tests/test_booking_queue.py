@@ -0,0 +1,19 @@
+import signal
+import sqlite3
+from .conftest import login, request
+from .test_events import open_stream
+
+def test_queued_bookings_are_written_on_shutdown(live_server, tmp_path):
+    # A long window keeps the booking queued (but acknowledged) when the signal arrives
+    proc, port = live_server(ALEXIS_BOOKING_GROUP_COMMIT_MS="3000", ALEXIS_BOOKING_ACK="queue")
+    response = open_stream(port, login(port))
+    booking = {"customerName": "Queued", "contact": "07000000000", "serviceType": "MOT", "date": "2035-01-02"}
+    status, body = request(port, "POST", "/api/bookings", booking)
+    assert status == 200
+
+    proc.send_signal(signal.SIGTERM)
+    proc.wait(timeout=20)
+    response.close()
+    conn = sqlite3.connect(tmp_path / "alexis.db")
+    assert conn.execute("SELECT customerName FROM bookings WHERE id=?", (body["id"],)).fetchone() == ("Queued",)
+    conn.close()
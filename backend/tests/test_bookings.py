@@ -0,0 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+
+def _book(client, day="2035-03-04"):
+    return client.post("/api/bookings", json={"customerName": "Race", "contact": "07000000000",
+                                              "serviceType": "Servicing", "date": day}).status_code
+
+def test_concurrent_bookings_never_overfill_a_slot(client):
+    token = client.post("/api/login", json={"username": "admin", "password": "password"}).json()["access_token"]
+    client.post("/api/settings", json={"key": "bookingCapacity", "value": {"defaultPerSlot": 3}},
+                headers={"Authorization": f"Bearer {token}"})
+    with ThreadPoolExecutor(10) as pool:
+        statuses = sorted(pool.map(lambda _: _book(client), range(10)))
+    assert statuses == [200] * 3 + [409] * 7
+    slots = client.get("/api/bookings/availability?from=2035-03-04&to=2035-03-04").json()["slots"]
+    servicing = next(s for s in slots if s["service"] == "Servicing")
+    assert (servicing["capacity"], servicing["booked"], servicing["available"]) == (3, 3, 0)
+
+def test_slots_are_uncapped_until_configured(client):
+    assert all(_book(client, "2035-03-05") == 200 for _ in range(12))
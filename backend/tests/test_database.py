@@ -0,0 +1,51 @@
+import queue
+import pytest
+from fastapi import HTTPException
+from backend import database
+from backend.database import ConnectionPool, pooled_connection
+
+def test_connections_are_tuned(conn):
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+def test_pool_reuses_the_last_released_connection(db_dir):
+    pool = ConnectionPool(size=2)
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert pool.acquire() is second
+    assert pool._opened == 2
+    pool.close()
+
+def test_release_rolls_back_an_open_transaction(db_dir):
+    pool = ConnectionPool(size=1)
+    c = pool.acquire()
+    c.execute("BEGIN IMMEDIATE")
+    c.execute("DELETE FROM cars")
+    pool.release(c)
+    c = pool.acquire()
+    assert not c.in_transaction
+    assert c.execute("SELECT count(*) FROM cars").fetchone()[0] > 0
+    pool.close()
+
+def test_exhausted_pool_times_out(db_dir):
+    pool = ConnectionPool(size=1)
+    held = pool.acquire()
+    with pytest.raises(queue.Empty):
+        pool.acquire(timeout=0.05)
+    pool.release(held)
+    pool.close()
+
+def test_pooled_connection_answers_503_when_busy(db_dir, monkeypatch):
+    pool = database.init_pool(1)
+    acquire = pool.acquire
+    monkeypatch.setattr(pool, "acquire", lambda: acquire(timeout=0.05))
+    try:
+        with pooled_connection():
+            with pytest.raises(HTTPException) as e:
+                with pooled_connection():
+                    pass
+        assert e.value.status_code == 503
+    finally:
+        database.close_pool()
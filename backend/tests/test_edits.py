@@ -0,0 +1,56 @@
+import pytest
+from fastapi import HTTPException
+from backend.edits import bulk_update, column_values, filter_clauses, price_expressions
+from backend.schemas import CarFilter, CarPatch, TyreFilter
+
+def _add_tyres(conn, brand, rim, prices):
+    conn.executemany("INSERT INTO tyres (brand, model, size, width, aspect, rim, price, quantity, category, image, specs) "
+                     "VALUES (?, 'P', ?, 225, 40, ?, ?, 4, 'Premium', '', '{}')",
+                     [(brand, f"225/40 R{rim}", rim, p) for p in prices])
+
+def test_ten_percent_offer_on_michelin_18_inch(conn):
+    conn.execute("DELETE FROM tyres")
+    _add_tyres(conn, "Michelin", 18, [100.0, 150.0])
+    _add_tyres(conn, "Michelin", 17, [90.0])
+    _add_tyres(conn, "Pirelli", 18, [120.0])
+    clauses, params = filter_clauses(TyreFilter(brand="michelin", rim=18).dict())
+    assert bulk_update(conn, "tyres", clauses, params, {}, price_expressions(None, 10)) == 2
+    conn.commit()
+    offers = conn.execute("SELECT brand, rim, price, offerPrice FROM tyres ORDER BY brand, rim, price").fetchall()
+    assert [tuple(r) for r in offers] == [("Michelin", 17, 90.0, None), ("Michelin", 18, 100.0, 90.0),
+                                          ("Michelin", 18, 150.0, 135.0), ("Pirelli", 18, 120.0, None)]
+
+def test_offer_is_taken_off_the_adjusted_price(conn):
+    _add_tyres(conn, "Adjust", 16, [200.0])
+    clauses, params = filter_clauses(TyreFilter(brand="Adjust").dict())
+    bulk_update(conn, "tyres", clauses, params, {}, price_expressions(-10, 25))
+    assert tuple(conn.execute("SELECT price, offerPrice FROM tyres WHERE brand='Adjust'").fetchone()) == (180.0, 135.0)
+
+def test_mark_twenty_cars_sold(conn):
+    conn.executemany("INSERT INTO cars (model, year, engine, price, image, sold, mileage, transmission, description, features) "
+                     "VALUES (?, 2020, '2.0', 10000, '', 0, 1, 'Manual', '', '[]')", [(f"Bulk {i}",) for i in range(25)])
+    ids = [r[0] for r in conn.execute("SELECT id FROM cars WHERE model LIKE 'Bulk %' ORDER BY id LIMIT 20")]
+    clauses, params = filter_clauses(CarFilter(ids=ids).dict())
+    columns = column_values(CarPatch(sold=True).dict(exclude_unset=True))
+    assert bulk_update(conn, "cars", clauses, params, columns, {}) == 20
+    assert conn.execute("SELECT count(*) FROM cars WHERE model LIKE 'Bulk %' AND sold").fetchone()[0] == 20
+
+def test_refusals():
+    with pytest.raises(HTTPException):
+        filter_clauses(TyreFilter().dict())  # would match every row
+    with pytest.raises(HTTPException):
+        column_values({"price": None})
+    with pytest.raises(HTTPException):
+        bulk_update(None, "tyres", ["id = ?"], [1], {"price": 1.0}, price_expressions(5, None))
+    assert column_values({"offerPrice": None}) == {"offerPrice": None}
+
+def test_patch_writes_only_what_was_sent(client):
+    token = client.post("/api/login", json={"username": "admin", "password": "password"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    tyre = client.get("/api/tyres?limit=1").json()["items"][0]
+    patched = client.patch(f"/api/tyres/{tyre['id']}", json={"offerPrice": 1.5}, headers=headers).json()
+    assert patched["offerPrice"] == 1.5 and patched["price"] == tyre["price"]
+    cleared = client.patch(f"/api/tyres/{tyre['id']}", json={"offerPrice": None}, headers=headers).json()
+    assert cleared["offerPrice"] is None and cleared["model"] == tyre["model"]
+    assert client.patch(f"/api/tyres/{tyre['id']}", json={"price": None}, headers=headers).status_code == 400
+    assert client.patch("/api/tyres/999999", json={"price": 1}, headers=headers).status_code == 404
@@ -0,0 +1,63 @@
+import asyncio
+import http.client
+import signal
+from backend.events import EventBus
+from .conftest import login, request
+
+def _collect(bus: EventBus, frames: list):
+    async def run():
+        async for frame in bus.stream():
+            frames.append(frame)
+    return run()
+
+def test_close_ends_open_and_later_streams():
+    async def scenario():
+        bus = EventBus()
+        bus.bind(asyncio.get_running_loop())
+        frames = []
+        task = asyncio.create_task(_collect(bus, frames))
+        await asyncio.sleep(0)
+        bus.publish("car.updated", {"id": 1})
+        await asyncio.sleep(0)
+        bus.close()
+        await asyncio.wait_for(task, 1)
+        later = []
+        await asyncio.wait_for(_collect(bus, later), 1)
+        return frames, later
+    frames, later = asyncio.run(scenario())
+    assert frames[0].startswith("retry:")
+    assert "event: car.updated" in frames[1]
+    assert later == ["retry: 3000\n\n"]
+
+def test_slow_subscriber_is_told_to_resync():
+    async def scenario():
+        bus = EventBus(queue_size=2)
+        bus.bind(asyncio.get_running_loop())
+        stream = bus.stream()
+        await stream.__anext__()
+        for i in range(5):
+            bus.publish("tyre.stock", {"i": i})
+        frame = await stream.__anext__()
+        await stream.aclose()
+        return frame
+    assert "event: resync" in asyncio.run(scenario())
+
+def open_stream(port: int, token: str):
+    """Open /api/admin/events with a ticket; returns the response after its first frame."""
+    status, body = request(port, "POST", "/api/admin/events/ticket", {}, token)
+    assert status == 200
+    stream = http.client.HTTPConnection("127.0.0.1", port, timeout=20)
+    stream.request("GET", f"/api/admin/events?ticket={body['ticket']}")
+    response = stream.getresponse()
+    assert response.status == 200
+    assert response.read1().startswith(b"retry:")
+    return response
+
+def test_shutdown_finishes_with_a_stream_open(live_server):
+    proc, port = live_server()
+    response = open_stream(port, login(port))
+    proc.send_signal(signal.SIGTERM)
+    # Without the signal hook uvicorn waits on the stream forever
+    proc.wait(timeout=20)
+    assert response.read() == b""
+    assert b"Application shutdown complete" in proc.stdout.read()
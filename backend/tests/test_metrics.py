@@ -0,0 +1,26 @@
+import sqlite3
+from starlette.routing import Route
+from backend.metrics import RequestStats, TracedConnection, _request_stats, _route_label
+
+def test_every_execute_path_is_counted():
+    conn = sqlite3.connect(":memory:", factory=TracedConnection)
+    stats = RequestStats()
+    token = _request_stats.set(stats)
+    try:
+        conn.execute("CREATE TABLE t (x)")
+        conn.cursor().execute("INSERT INTO t VALUES (1)")
+        conn.cursor().executemany("INSERT INTO t VALUES (?)", [(2,), (3,)])
+        conn.executescript("INSERT INTO t VALUES (4); INSERT INTO t VALUES (5);")
+        conn.cursor().executescript("DELETE FROM t WHERE x = 5;")
+    finally:
+        _request_stats.reset(token)
+    assert stats.statements == 5
+    assert stats.sql_seconds > 0
+    conn.close()
+
+def test_route_label_uses_the_route_template():
+    route = Route("/cars/{car_id}", lambda request: None)
+    # A literal segment equal to a parameter value stays literal
+    scope = {"route": route, "path": "/api/cars/cars", "path_params": {"car_id": "cars"}}
+    assert _route_label(scope) == "/api/cars/{car_id}"
+    assert _route_label({"path": "/nope"}) == "unmatched"
@@ -0,0 +1,45 @@
+import pytest
+from fastapi import HTTPException
+from backend.pagination import decode_cursor, encode_cursor, keyset_page
+
+def _add_tyres(conn, prices):
+    conn.executemany("INSERT INTO tyres (brand, model, size, price, quantity, category, image, specs) "
+                     "VALUES ('Paged', ?, '205/55 R16', ?, 1, 'Budget', '', '{}')",
+                     [(f"M{i}", price) for i, price in enumerate(prices)])
+    conn.commit()
+
+def _walk(conn, sort_column, descending, limit):
+    seen, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(conn, "tyres", ["brand = ?"], ["Paged"], sort_column, descending, cursor, limit)
+        seen.extend((r[sort_column], r["id"]) for r in rows)
+        if cursor is None:
+            return seen
+
+def test_cursor_round_trips():
+    assert decode_cursor(encode_cursor(12.5, 7)) == (12.5, 7)
+    assert decode_cursor(encode_cursor("Audi A4", 3)) == ("Audi A4", 3)
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor")
+
+@pytest.mark.parametrize("sort_column,descending", [("id", True), ("id", False), ("price", False), ("price", True)])
+def test_pages_cover_every_row_once_in_order(conn, sort_column, descending):
+    # Repeated prices make the id tie-breaker matter
+    _add_tyres(conn, [50, 70, 50, 60, 70, 50, 80, 60, 50, 90, 70])
+    seen = _walk(conn, sort_column, descending, limit=3)
+    assert len(seen) == 11 and len(set(seen)) == 11
+    assert seen == sorted(seen, reverse=descending)
+
+def test_last_full_page_has_no_cursor(conn):
+    _add_tyres(conn, [10, 20, 30])
+    rows, cursor = keyset_page(conn, "tyres", ["brand = ?"], ["Paged"], "id", False, None, 3)
+    assert len(rows) == 3 and cursor is None
+
+def test_list_shape_only_changes_with_limit_or_cursor(client):
+    assert isinstance(client.get("/api/cars").json(), list)
+    assert isinstance(client.get("/api/tyres?_=123").json(), list)
+    page = client.get("/api/tyres?limit=2").json()
+    assert len(page["items"]) == 2 and page["next_cursor"]
+    rest = client.get(f"/api/tyres?cursor={page['next_cursor']}").json()
+    assert {t["id"] for t in rest["items"]}.isdisjoint(t["id"] for t in page["items"])
+    assert client.get("/api/cars?sort=price_asc").status_code == 400
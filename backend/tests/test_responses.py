@@ -0,0 +1,43 @@
+import gzip
+import json
+from email.utils import formatdate
+from starlette.requests import Request
+from backend.cache import CachedBody
+from backend.responses import cached_response
+
+def _request(**headers) -> Request:
+    return Request({"type": "http", "method": "GET", "path": "/api/cars",
+                    "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+
+BODY = CachedBody(json.dumps([{"id": i, "model": "Audi A4"} for i in range(100)]).encode())
+
+def test_matching_etag_is_304_with_validators():
+    response = cached_response(_request(if_none_match=BODY.etag), BODY)
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == BODY.etag
+
+def test_etag_lists_and_weak_tags_match():
+    assert cached_response(_request(if_none_match=f'"other", W/{BODY.etag}'), BODY).status_code == 304
+    assert cached_response(_request(if_none_match="*"), BODY).status_code == 304
+    assert cached_response(_request(if_none_match='"other"'), BODY).status_code == 200
+
+def test_if_modified_since():
+    assert cached_response(_request(if_modified_since=formatdate(BODY.last_modified + 1, usegmt=True)), BODY).status_code == 304
+    assert cached_response(_request(if_modified_since=formatdate(BODY.last_modified - 60, usegmt=True)), BODY).status_code == 200
+    assert cached_response(_request(if_modified_since="garbage"), BODY).status_code == 200
+
+def test_if_none_match_wins_over_if_modified_since():
+    since = formatdate(BODY.last_modified + 1, usegmt=True)
+    assert cached_response(_request(if_none_match='"other"', if_modified_since=since), BODY).status_code == 200
+
+def test_full_response_is_compressed_when_accepted():
+    response = cached_response(_request(accept_encoding="gzip"), BODY)
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == BODY.body
+
+def test_revalidation_through_the_app(client):
+    first = client.get("/api/services")
+    again = client.get("/api/services", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
@@ -0,0 +1,49 @@
+import pytest
+from jose import jwt
+from backend import signing_keys
+from backend.signing_keys import RETAINED_KEYS, KeyRing, rotate
+
+@pytest.fixture
+def key_file(tmp_path, monkeypatch):
+    monkeypatch.delenv("ALEXIS_JWT_SECRET", raising=False)
+    monkeypatch.setattr(signing_keys, "RELOAD_INTERVAL_SECONDS", 0)
+    return str(tmp_path / "jwt_keys.json")
+
+def _sign(ring: KeyRing, sub: str) -> str:
+    kid, key = ring.signing_key()
+    return jwt.encode({"sub": sub}, key, algorithm="HS256", headers={"kid": kid})
+
+def _verify(ring: KeyRing, token: str):
+    key = ring.verification_key(jwt.get_unverified_header(token)["kid"])
+    return None if key is None else jwt.decode(token, key, algorithms=["HS256"])["sub"]
+
+def test_workers_share_the_generated_key(key_file):
+    first, second = KeyRing(key_file), KeyRing(key_file)
+    assert _verify(second, _sign(first, "admin")) == "admin"
+
+def test_rotation_keeps_older_tokens_valid(key_file):
+    ring = KeyRing(key_file)
+    old = _sign(ring, "admin")
+    old_kid = ring.signing_key()[0]
+    new_kid = rotate(key_file)
+    # A sibling that has not reloaded yet still verifies tokens from the new key
+    other = KeyRing(key_file)
+    assert _verify(ring, _sign(other, "fresh")) == "fresh"
+    assert ring.signing_key()[0] == new_kid != old_kid
+    assert _verify(ring, old) == "admin"
+
+def test_keys_beyond_the_retained_ones_stop_verifying(key_file):
+    ring = KeyRing(key_file)
+    old = _sign(ring, "admin")
+    # Several rotations within one second must still keep the newest key active
+    for _ in range(RETAINED_KEYS + 1):
+        kid = rotate(key_file)
+    assert ring.signing_key()[0] == kid
+    assert len(ring._keys) == RETAINED_KEYS + 1
+    assert _verify(ring, old) is None
+
+def test_secret_from_the_environment(key_file, monkeypatch):
+    monkeypatch.setenv("ALEXIS_JWT_SECRET", "s3cret")
+    ring = KeyRing(key_file)
+    assert ring.signing_key() == ("env", "s3cret")
+    assert _verify(ring, _sign(ring, "admin")) == "admin"
@@ -0,0 +1,44 @@
+from backend.stats import LOW_STOCK_THRESHOLD, inventory_summary, rebuild_inventory_stats
+
+def _snapshot(conn):
+    return {(r["scope"], r["name"]): (r["items"], r["units"], round(r["value"], 6), r["low_stock"], r["out_of_stock"])
+            for r in conn.execute("SELECT * FROM inventory_stats")}
+
+def _add_tyre(conn, brand, category, price, quantity, offer=None):
+    return conn.execute("INSERT INTO tyres (brand, model, size, price, offerPrice, quantity, category, image, specs) "
+                        "VALUES (?, 'T', '205/55 R16', ?, ?, ?, ?, '', '{}')", (brand, price, offer, quantity, category)).lastrowid
+
+def test_triggers_match_a_rebuild(conn):
+    a = _add_tyre(conn, "StatsA", "Premium", 100.0, 10)
+    b = _add_tyre(conn, "StatsA", "Budget", 60.0, 2, offer=55.0)
+    c = _add_tyre(conn, "StatsB", "Budget", 40.0, 0)
+    conn.execute("UPDATE tyres SET quantity = quantity - 7 WHERE id=?", (a,))
+    conn.execute("UPDATE tyres SET offerPrice = NULL, price = 65.0 WHERE id=?", (b,))
+    conn.execute("UPDATE tyres SET brand = 'StatsC', quantity = 4 WHERE id=?", (c,))
+    conn.execute("UPDATE tyres SET category = 'Premium' WHERE brand = 'StatsA'")
+    conn.execute("UPDATE tyres SET image = 'x' WHERE id=?", (a,))
+    conn.execute("DELETE FROM tyres WHERE id=?", (b,))
+    car = conn.execute("INSERT INTO cars (model, year, engine, price, image, sold, mileage, transmission, description, features) "
+                       "VALUES ('Stats Car', 2020, '2.0', 20000, '', 0, 1, 'Manual', '', '[]')").lastrowid
+    conn.execute("UPDATE cars SET sold = 1, price = 19000 WHERE id=?", (car,))
+    conn.execute("UPDATE cars SET sold = 0 WHERE id IN (SELECT id FROM cars LIMIT 2)")
+    conn.commit()
+
+    incremental = _snapshot(conn)
+    # The emptied StatsB brand row is pruned rather than left at zero
+    assert ("tyre_brand", "StatsB") not in incremental
+    rebuild_inventory_stats(conn)
+    conn.commit()
+    assert _snapshot(conn) == incremental
+
+def test_summary_totals(conn):
+    _add_tyre(conn, "Low", "Budget", 10.0, LOW_STOCK_THRESHOLD)
+    _add_tyre(conn, "Low", "Budget", 10.0, 0)
+    conn.commit()
+    summary = inventory_summary(conn)
+    brand = next(b for b in summary["brands"] if b["name"] == "Low")
+    assert brand == {"name": "Low", "skus": 2, "units": LOW_STOCK_THRESHOLD, "stockValue": 10.0 * LOW_STOCK_THRESHOLD,
+                     "lowStock": 1, "outOfStock": 1}
+    tyres = conn.execute("SELECT count(*), TOTAL(quantity) FROM tyres").fetchone()
+    assert (summary["tyres"]["skus"], summary["tyres"]["units"]) == (tyres[0], tyres[1])
+    assert summary["cars"]["total"] == conn.execute("SELECT count(*) FROM cars").fetchone()[0]
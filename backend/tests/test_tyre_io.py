@@ -0,0 +1,21 @@
+import io
+from backend.tyre_io import ErrorReport, iter_records, upsert_batch, validate_records
+
+HEADER = "brand,model,size,price,offerPrice,quantity,category,image,fuel,wet,noise\n"
+
+def _csv(lines) -> io.BytesIO:
+    return io.BytesIO((HEADER + "".join(lines)).encode())
+
+def test_error_report_keeps_only_the_first_rows():
+    bad = _csv(f"Brand,M{i},205/55 R16,not-a-price,,1,Budget,,C,B,70\n" for i in range(1000))
+    errors = ErrorReport(limit=50)
+    assert list(validate_records(iter_records(bad, "csv"), errors)) == []
+    assert errors.count == 1000
+    assert len(errors.rows) == 50 and errors.rows[0]["row"] == 2
+
+def test_repeated_rows_in_a_batch_share_one_tyre(conn):
+    rows = _csv(["Dup,One,205/55 R16,70,,1,Budget,,C,B,70\n", "Dup,One,205/55 R16,75,,2,Budget,,C,B,70\n"])
+    batch = list(validate_records(iter_records(rows, "csv"), ErrorReport()))
+    assert upsert_batch(conn, batch) == (1, 0)
+    conn.commit()
+    assert [tuple(r) for r in conn.execute("SELECT price, quantity FROM tyres WHERE brand='Dup'")] == [(75.0, 2)]
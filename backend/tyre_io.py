@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from .database import pooled_connection
+from .schemas import TyreProduct
+from .tyresize import size_parts
+
+# Flat column layout used for CSV; specs are spread over fuel/wet/noise.
+CSV_COLUMNS = ["id", "brand", "model", "size", "price", "offerPrice", "quantity", "category", "image", "fuel", "wet", "noise"]
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 200
+
+def _csv_record(row: dict) -> dict:
+    """Map a CSV row (all strings) onto the TyreProduct shape."""
+    record = {k: (v.strip() if isinstance(v, str) else v) for k, v in row.items() if k}
+    for key in ("id", "offerPrice"):
+        if record.get(key) == "":
+            record[key] = None
+    if "specs" in record and record["specs"]:
+        record["specs"] = json.loads(record["specs"])
+    else:
+        record["specs"] = {"fuel": record.pop("fuel", None), "wet": record.pop("wet", None), "noise": record.pop("noise", None)}
+    return record
+
+def iter_records(stream, fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yield (line_number, record, parse_error) from a binary upload without loading it whole."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            try:
+                yield reader.line_num, _csv_record(row), None
+            except ValueError as e:
+                yield reader.line_num, None, str(e)
+    else:
+        for line_num, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_num, json.loads(line), None
+            except ValueError as e:
+                yield line_num, None, f"Invalid JSON: {e}"
+
+class ErrorReport:
+    """Failed rows of an import: all are counted, only the first `limit` are kept."""
+
+    def __init__(self, limit: int = MAX_REPORTED_ERRORS):
+        self.limit = limit
+        self.count = 0
+        self.rows: List[dict] = []
+
+    def append(self, error: dict):
+        self.count += 1
+        if len(self.rows) < self.limit:
+            self.rows.append(error)
+
+def validate_records(records: Iterable[Tuple[int, Optional[dict], Optional[str]]], errors: ErrorReport) -> Iterator[TyreProduct]:
+    """Yield valid TyreProducts; report {row, error} for the rest."""
+    for line_num, record, parse_error in records:
+        if parse_error is None:
+            try:
+                yield TyreProduct.model_validate(record)
+                continue
+            except ValidationError as e:
+                parse_error = "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+        errors.append({"row": line_num, "error": parse_error})
+
+def upsert_batch(conn, batch: List[TyreProduct]) -> Tuple[int, int]:
+    """Insert or update a batch in the caller's transaction. Returns (inserted, updated).
+
+    Rows with an id update that tyre; rows without one match an existing
+    tyre on (brand, model, size) before falling back to an insert.
+    """
+    params = []
+    existing_ids = set()
+    # Repeated ids / natural keys within the batch share one row (last wins),
+    # since the lookup below can't see rows this batch hasn't written yet.
+    slots: Dict[tuple, int] = {}
+    explicit_ids = [t.id for t in batch if t.id is not None]
+    if explicit_ids:
+        placeholders = ",".join("?" * len(explicit_ids))
+        existing_ids.update(r[0] for r in conn.execute(f"SELECT id FROM tyres WHERE id IN ({placeholders})", explicit_ids))
+    for t in batch:
+        natural_key = ("natural", t.brand, t.model, t.size)
+        slot = slots.get(("id", t.id) if t.id is not None else natural_key)
+        tyre_id = t.id
+        if tyre_id is None:
+            if slot is not None:
+                tyre_id = params[slot][0]
+            else:
+                row = conn.execute("SELECT id FROM tyres WHERE brand=? AND model=? AND size=? LIMIT 1", (t.brand, t.model, t.size)).fetchone()
+                if row:
+                    tyre_id = row[0]
+                    existing_ids.add(tyre_id)
+        width, aspect, rim = size_parts(t.size)
+        values = (tyre_id, t.brand, t.model, t.size, t.price, t.offerPrice, t.quantity, t.category, t.image,
+                  json.dumps(t.specs.dict()), width, aspect, rim)
+        if slot is None:
+            slot = len(params)
+            params.append(values)
+        else:
+            params[slot] = values
+        slots[natural_key] = slot
+        if tyre_id is not None:
+            slots[("id", tyre_id)] = slot
+    conn.executemany(
+        "INSERT INTO tyres (id, brand, model, size, price, offerPrice, quantity, category, image, specs, width, aspect, rim) "
+        "VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?) "
+        "ON CONFLICT(id) DO UPDATE SET brand=excluded.brand, model=excluded.model, size=excluded.size, "
+        "price=excluded.price, offerPrice=excluded.offerPrice, quantity=excluded.quantity, category=excluded.category, "
+        "image=excluded.image, specs=excluded.specs, width=excluded.width, aspect=excluded.aspect, rim=excluded.rim",
+        params
+    )
+    updated = sum(1 for p in params if p[0] in existing_ids)
+    return len(params) - updated, updated
+
+_EXPORT_SQL = ("SELECT id, brand, model, size, price, offerPrice, quantity, category, image, specs FROM tyres "
+               "WHERE id > ? ORDER BY id LIMIT ?")
+
+def _export_chunk(after_id: int, limit: int):
+    # A connection per chunk, released before the chunk is sent, so a slow or
+    # vanished client never keeps one borrowed from the pool.
+    with pooled_connection() as conn:
+        return conn.execute(_EXPORT_SQL, (after_id, limit)).fetchall()
+
+def export_rows(fmt: str, chunk_size: int = 500) -> Iterator[str]:
+    """Stream the tyres table as CSV or NDJSON text chunks, keyset-paged by id."""
+    last_id = 0
+    if fmt == "csv":
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        yield ",".join(CSV_COLUMNS) + "\r\n"
+    while True:
+        rows = _export_chunk(last_id, chunk_size)
+        if not rows:
+            break
+        last_id = rows[-1]["id"]
+        if fmt == "csv":
+            for r in rows:
+                specs = json.loads(r["specs"])
+                writer.writerow([r["id"], r["brand"], r["model"], r["size"], r["price"], r["offerPrice"], r["quantity"],
+                                 r["category"], r["image"], specs.get("fuel"), specs.get("wet"), specs.get("noise")])
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        else:
+            # specs is already JSON text, so splice it in rather than re-decoding it
+            yield "".join(
+                json.dumps({k: r[k] for k in r.keys() if k != "specs"})[:-1] + ', "specs": ' + r["specs"] + "}\n"
+                for r in rows
+            )
@@ -0,0 +1,24 @@
+import re
+from typing import Optional, Tuple
+
+# Matches metric sizes such as "225/40 R18", "225/40R18", "225/40 ZR 18" or "225/40-18".
+_SIZE_RE = re.compile(r'(\d{3})\s*/\s*(\d{2})\s*(?:[A-Z]{0,2}R|-)?\s*(\d{2})', re.IGNORECASE)
+
+def parse_tyre_size(size: str) -> Optional[Tuple[int, int, int]]:
+    """Return (width, aspect, rim) for a metric tyre size, or None if unrecognised."""
+    if not size:
+        return None
+    m = _SIZE_RE.search(size)
+    if not m:
+        return None
+    return int(m.group(1)), int(m.group(2)), int(m.group(3))
+
+def size_parts(size: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+    """Like parse_tyre_size but yields NULL-able column values for storage."""
+    return parse_tyre_size(size) or (None, None, None)
+
+def format_tyre_size(width: int, aspect: int, rim: int) -> str:
+    return f"{width}/{aspect} R{rim}"
+
+def overall_diameter_mm(width: int, aspect: int, rim: int) -> float:
+    return rim * 25.4 + 2 * width * aspect / 100.0
@@ -82,7 +82,9 @@ export class AdminInventoryComponent {
 
   onFileSelected(event: any) {
     const file = event.target.files[0];
-    if (file) {
+    if (file && !this.dataService.isDemoMode()) {
+      this.dataService.uploadImage(file).subscribe(upload => this.carForm.patchValue({ image: upload.key }));
+    } else if (file) {
       const reader = new FileReader();
       reader.onload = (e: any) => {
         const base64String = e.target.result;
@@ -38,7 +38,7 @@ export class AdminTyresComponent {
           size: formVal.size,
           category: formVal.category,
           price: formVal.price,
-          offerPrice: formVal.offerPrice || undefined,
+          offerPrice: formVal.offerPrice ?? null,
           quantity: formVal.quantity,
           image: formVal.image || `https://picsum.photos/seed/${formVal.brand.toLowerCase()}/300/300`,
           specs: {
@@ -96,7 +96,9 @@ export class AdminTyresComponent {
 
   onFileSelected(event: any) {
     const file = event.target.files[0];
-    if (file) {
+    if (file && !this.dataService.isDemoMode()) {
+      this.dataService.uploadImage(file).subscribe(upload => this.tyreProductForm.patchValue({ image: upload.key }));
+    } else if (file) {
       const reader = new FileReader();
       reader.onload = (e: any) => {
         const base64String = e.target.result;
@@ -37,6 +37,14 @@ export class HomeComponent {
   // Search state
   tyreSearchQuery = '';
   foundTyres = signal<TyreProduct[]>([]);
+  // Set while browsing a brand page by page; null for a search or the last page
+  tyreBrand = signal<string | null>(null);
+  tyreCursor = signal<string | null>(null);
+
+  // Cars page, fetched a page at a time
+  cars = signal<Car[]>([]);
+  carCursor = signal<string | null>(null);
+  loadingCars = signal(false);
 
   // Car Modal state
   selectedCar = signal<Car | null>(null);
@@ -55,13 +63,39 @@ export class HomeComponent {
 
   navigateTo(page: string) {
     this.currentPage.set(page as Page);
+    if (page === 'cars') this.loadCars(true);
     window.scrollTo({ top: 0, behavior: 'smooth' });
   }
 
+  loadCars(reset = false) {
+    if (this.loadingCars()) return;
+    this.loadingCars.set(true);
+    const cursor = reset ? undefined : this.carCursor() ?? undefined;
+    this.dataService.fetchCarPage({ cursor }).subscribe({
+      next: page => {
+        this.cars.update(cars => reset ? page.items : [...cars, ...page.items]);
+        this.carCursor.set(page.next_cursor);
+        this.loadingCars.set(false);
+      },
+      error: () => this.loadingCars.set(false)
+    });
+  }
+
   searchTyres() {
+    this.tyreBrand.set(null);
+    this.tyreCursor.set(null);
     this.foundTyres.set(this.dataService.searchTyres(this.tyreSearchQuery));
   }
 
+  browseTyreBrand(brand: string, more = false) {
+    const cursor = more ? this.tyreCursor() ?? undefined : undefined;
+    this.dataService.fetchTyrePage({ brand, cursor }).subscribe(page => {
+      this.tyreBrand.set(brand);
+      this.foundTyres.update(tyres => more ? [...tyres, ...page.items] : page.items);
+      this.tyreCursor.set(page.next_cursor);
+    });
+  }
+
   viewCarDetails(car: Car) {
     this.selectedCar.set(car);
     document.body.style.overflow = 'hidden';
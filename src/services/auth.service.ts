@@ -21,6 +21,7 @@ export class AuthService {
       this.currentUser.set(storedUser);
       // Load protected data now that we know we are logged in
       this.dataService.loadBookings();
+      this.dataService.connectAdminEvents();
     }
   }
 
@@ -33,6 +34,7 @@ export class AuthService {
            sessionStorage.setItem('alexis_admin_user', res.username);
            sessionStorage.setItem('alexis_token', res.access_token);
            this.dataService.loadBookings();
+           this.dataService.connectAdminEvents();
          }
       })
     );
@@ -43,5 +45,6 @@ export class AuthService {
     this.currentUser.set(null);
     sessionStorage.removeItem('alexis_admin_user');
     sessionStorage.removeItem('alexis_token');
+    this.dataService.disconnectAdminEvents();
   }
 }
@@ -1,6 +1,6 @@
 
 import { Injectable, signal, inject } from '@angular/core';
-import { HttpClient, HttpHeaders, HttpErrorResponse } from '@angular/common/http';
+import { HttpClient, HttpHeaders, HttpErrorResponse, HttpParams } from '@angular/common/http';
 import { firstValueFrom, Observable, of, throwError } from 'rxjs';
 import { catchError, tap } from 'rxjs/operators';
 import { environment } from '../environments/environment';
@@ -25,7 +25,7 @@ export interface TyreProduct {
   model: string;
   size: string;
   price: number;
-  offerPrice?: number; 
+  offerPrice?: number | null;
   quantity: number;    
   category: 'Premium' | 'Mid-Range' | 'Budget';
   image: string;
@@ -36,6 +36,72 @@ export interface TyreProduct {
   };
 }
 
+export interface Bootstrap {
+  cars: Car[];
+  services: ServiceItem[];
+  tyres: TyreProduct[];
+  brands: TyreBrand[];
+  banner: Banner;
+  companyInfo: CompanyInfo;
+}
+
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
+export interface CarQuery {
+  brand?: string;
+  transmission?: string;
+  sold?: boolean;
+  min_price?: number;
+  max_price?: number;
+  sort?: 'newest' | 'price_asc' | 'price_desc' | 'year_desc' | 'mileage_asc';
+  cursor?: string;
+  limit?: number;
+}
+
+export interface TyreQuery {
+  brand?: string;
+  category?: string;
+  in_stock?: boolean;
+  min_price?: number;
+  max_price?: number;
+  sort?: 'newest' | 'price_asc' | 'price_desc' | 'stock_desc';
+  cursor?: string;
+  limit?: number;
+}
+
+export interface SearchHit {
+  kind: 'car' | 'tyre';
+  score: number;
+  car?: Car;
+  tyre?: TyreProduct;
+}
+
+export interface TyreStats {
+  name: string;
+  skus: number;
+  units: number;
+  stockValue: number;
+  lowStock: number;
+  outOfStock: number;
+}
+
+export interface InventoryStats {
+  tyres: TyreStats;
+  brands: TyreStats[];
+  categories: TyreStats[];
+  cars: { total: number; unsold: number; sold: number; unsoldValue: number };
+  lowStockThreshold: number;
+}
+
+export interface ImageUpload {
+  key: string;
+  url: string;
+  widths: number[];
+}
+
 export interface TyreBrand {
   name: string;
   image?: string; 
@@ -60,6 +126,21 @@ export interface Booking {
   date: string;
   status: 'Pending' | 'Confirmed' | 'Completed' | 'Cancelled';
   notes?: string;
+  created_at?: string;
+  updated_at?: string;
+  version?: number;
+}
+
+export interface BookingPage {
+  items: Booking[];
+  next_cursor: string | null;
+  version: number;
+}
+
+export interface BookingAvailability {
+  from: string;
+  to: string;
+  slots: { slot: string; service: string; capacity: number | null; booked: number; available: number | null; }[];
 }
 
 export interface ServiceItem {
@@ -138,6 +219,8 @@ export class DataService {
   tyreInventory = signal<TyreProduct[]>([]);
   services = signal<ServiceItem[]>([]);
   bookings = signal<Booking[]>([]);
+  inventoryStats = signal<InventoryStats | null>(null);
+  private bookingsVersion: number | null = null;
   
   locations = signal<Location[]>([
     { city: "Loughborough", type: "Main Service Centre", addressLine: "Unit C5, Cumberland Trading Estate" },
@@ -206,13 +289,7 @@ export class DataService {
     if (this.isDemoMode()) return;
     console.log('Connecting to API:', this.apiUrl);
     try {
-      await Promise.all([
-        this.loadCars(),
-        this.loadServices(),
-        this.loadTyres(),
-        this.loadBrands(),
-        this.loadSettings()
-      ]);
+      await this.loadBootstrap();
       console.log('Sync complete.');
       this.banner.set({ active: false, reason: '' });
     } catch (e: any) {
@@ -301,10 +378,27 @@ export class DataService {
   }
   public loadBookings() {
     if (this.isDemoMode()) return Promise.resolve();
-    return firstValueFrom(this.http.get<Booking[]>(`${this.apiUrl}/bookings`, this.getOptions(true)))
-      .then(data => this.bookings.set(data))
+    return this.syncBookings()
       .catch(err => console.log('Cannot load bookings (unauthorized)'));
   }
+
+  // Fetch only bookings changed since the last sync and merge them in
+  private async syncBookings() {
+    let since = this.bookingsVersion ?? 0;
+    const changed = new Map<number, Booking>();
+    while (true) {
+      const page = await firstValueFrom(this.http.get<BookingPage>(`${this.apiUrl}/bookings`, { ...this.getOptions(true), params: this.toParams({ since, limit: 500 }) }));
+      page.items.forEach(b => changed.set(b.id, b));
+      since = page.version;
+      if (!page.next_cursor) break;
+    }
+    const current = this.bookingsVersion === null ? [] : this.bookings();
+    const merged = current.map(b => changed.get(b.id) ?? b);
+    const known = new Set(current.map(b => b.id));
+    changed.forEach((b, id) => { if (!known.has(id)) merged.push(b); });
+    this.bookings.set(merged);
+    this.bookingsVersion = since;
+  }
   private loadTyres() {
     return firstValueFrom(this.http.get<TyreProduct[]>(`${this.apiUrl}/tyres`, this.getOptions(false)))
       .then(data => this.tyreInventory.set(data));
@@ -319,22 +413,165 @@ export class DataService {
       if (banner && banner.active) this.banner.set(banner);
 
       const info = await firstValueFrom(this.http.get<CompanyInfo>(`${this.apiUrl}/settings/companyInfo`, this.getOptions(false)));
-      if (info) {
-        // Ensure defaults for new fields if backend data is old
-        if (!info.about) {
-           info.about = "Alexis Autos Limited represents speed, precision, and automotive excellence.";
-        }
-        if (!info.socialMedia) {
-           info.socialMedia = { facebook: "", instagram: "" };
-        }
-        if (!info.logos) {
-           info.logos = { dark: "", light: "" };
-        }
-        this.companyInfo.set(info);
-      }
+      if (info) this.applyCompanyInfo(info);
     } catch (e) { console.warn('Could not load settings'); }
   }
 
+  private applyCompanyInfo(info: CompanyInfo) {
+    // Ensure defaults for new fields if backend data is old
+    if (!info.about) {
+       info.about = "Alexis Autos Limited represents speed, precision, and automotive excellence.";
+    }
+    if (!info.socialMedia) {
+       info.socialMedia = { facebook: "", instagram: "" };
+    }
+    if (!info.logos) {
+       info.logos = { dark: "", light: "" };
+    }
+    this.companyInfo.set(info);
+  }
+
+  // Whole public payload in one round trip; falls back to individual calls on older backends.
+  private async loadBootstrap() {
+    let data: Bootstrap;
+    try {
+      data = await firstValueFrom(this.http.get<Bootstrap>(`${this.apiUrl}/bootstrap`, this.getOptions(false)));
+    } catch (e: any) {
+      if (e.status !== 404) throw e;
+      await Promise.all([
+        this.loadCars(),
+        this.loadServices(),
+        this.loadTyres(),
+        this.loadBrands(),
+        this.loadSettings()
+      ]);
+      return;
+    }
+    this.inventory.set(data.cars);
+    this.services.set(data.services);
+    this.tyreInventory.set(data.tyres);
+    this.tyreBrands.set(data.brands);
+    if (data.banner && data.banner.active) this.banner.set(data.banner);
+    if (data.companyInfo && Object.keys(data.companyInfo).length) this.applyCompanyInfo(data.companyInfo);
+  }
+
+  // --- Admin change feed (SSE) ---
+  private adminEvents: EventSource | null = null;
+
+  // EventSource cannot send the Authorization header, so each connection
+  // uses a one-time ticket instead of putting the token in the URL.
+  private adminEventsRetry: ReturnType<typeof setTimeout> | null = null;
+
+  connectAdminEvents() {
+    if (this.isDemoMode() || this.adminEvents || !sessionStorage.getItem('alexis_token')) return;
+    this.http.post<{ ticket: string; expires_in: number }>(`${this.apiUrl}/admin/events/ticket`, {}, this.getOptions(true))
+      .subscribe({
+        next: ({ ticket }) => this.openAdminEvents(ticket),
+        error: () => console.warn('Could not connect to admin events')
+      });
+  }
+
+  private openAdminEvents(ticket: string) {
+    if (this.adminEvents) return;
+    const source = new EventSource(`${this.apiUrl}/admin/events?ticket=${encodeURIComponent(ticket)}`);
+    const on = (event: string, apply: (data: any) => void) =>
+      source.addEventListener(event, (e: MessageEvent) => apply(JSON.parse(e.data)));
+
+    on('booking.created', (b: Booking) => this.bookings.update(list => list.some(x => x.id === b.id) ? list : [...list, b]));
+    on('booking.status', (d: { id: number; status: Booking['status'] }) =>
+      this.bookings.update(list => list.map(b => b.id === d.id ? { ...b, status: d.status } : b)));
+    on('tyre.stock', (d: { quantities: Record<string, number> }) =>
+      this.tyreInventory.update(tyres => tyres.map(t => d.quantities[t.id] !== undefined ? { ...t, quantity: d.quantities[t.id] } : t)));
+    on('tyre.created', (t: TyreProduct) => this.tyreInventory.update(list => list.some(x => x.id === t.id) ? list : [...list, t]));
+    on('tyre.updated', (t: TyreProduct) => this.tyreInventory.update(list => list.map(x => x.id === t.id ? t : x)));
+    on('tyre.deleted', (d: { id: number }) => this.tyreInventory.update(list => list.filter(x => x.id !== d.id)));
+    on('car.created', (c: Car) => this.inventory.update(list => list.some(x => x.id === c.id) ? list : [...list, c]));
+    on('car.updated', (c: Car) => this.inventory.update(list => list.map(x => x.id === c.id ? c : x)));
+    on('car.sold', (c: Car) => this.inventory.update(list => list.map(x => x.id === c.id ? c : x)));
+    on('car.deleted', (d: { id: number }) => this.inventory.update(list => list.filter(x => x.id !== d.id)));
+    // Sent when we fell behind (or after a bulk import); fall back to a full refresh
+    on('resync', () => { this.loadBookings(); this.initializeData(); });
+    on('tyres.imported', () => this.initializeData());
+    on('tyres.bulk_edited', () => this.initializeData());
+    on('cars.bulk_edited', () => this.initializeData());
+    for (const event of ['tyre.stock', 'tyre.created', 'tyre.updated', 'tyre.deleted', 'car.created', 'car.updated', 'car.sold', 'car.deleted', 'tyres.imported', 'tyres.bulk_edited', 'cars.bulk_edited', 'resync']) {
+      on(event, () => this.scheduleStatsRefresh());
+    }
+    // The browser retries with the same (now spent) ticket; once it gives up, reconnect with a fresh one
+    source.onerror = () => {
+      if (source.readyState !== EventSource.CLOSED || this.adminEvents !== source) return;
+      this.adminEvents = null;
+      this.adminEventsRetry = setTimeout(() => {
+        this.adminEventsRetry = null;
+        this.connectAdminEvents();
+        this.loadBookings();
+        this.initializeData();
+      }, 5000);
+    };
+    this.adminEvents = source;
+    this.loadInventoryStats();
+  }
+
+  // --- Admin dashboard totals (precomputed server-side) ---
+  private statsRefresh: ReturnType<typeof setTimeout> | null = null;
+
+  loadInventoryStats() {
+    if (this.isDemoMode()) return;
+    this.http.get<InventoryStats>(`${this.apiUrl}/admin/stats`, this.getOptions(true))
+      .subscribe({ next: stats => this.inventoryStats.set(stats), error: () => console.warn('Could not load inventory stats') });
+  }
+
+  // Stock changes arrive in bursts; refetch once they settle
+  private scheduleStatsRefresh() {
+    if (this.statsRefresh) clearTimeout(this.statsRefresh);
+    this.statsRefresh = setTimeout(() => { this.statsRefresh = null; this.loadInventoryStats(); }, 500);
+  }
+
+  disconnectAdminEvents() {
+    if (this.adminEventsRetry) clearTimeout(this.adminEventsRetry);
+    this.adminEventsRetry = null;
+    this.adminEvents?.close();
+    this.adminEvents = null;
+  }
+
+  // --- Server-side paged queries ---
+  private toParams(query: object): HttpParams {
+    let params = new HttpParams();
+    for (const [key, value] of Object.entries(query)) {
+      if (value !== undefined && value !== null && value !== '') params = params.set(key, String(value));
+    }
+    return params;
+  }
+
+  // A page is only returned when a limit is sent; without one /cars and /tyres return the whole list.
+  fetchCarPage(query: CarQuery = {}): Observable<Page<Car>> {
+    if (this.isDemoMode()) return of({ items: this.inventory(), next_cursor: null });
+    return this.http.get<Page<Car>>(`${this.apiUrl}/cars`, { ...this.getOptions(false), params: this.toParams({ limit: 24, ...query }) });
+  }
+
+  fetchTyrePage(query: TyreQuery = {}): Observable<Page<TyreProduct>> {
+    if (this.isDemoMode()) {
+      return of({ items: this.tyreInventory().filter(t => !query.brand || t.brand === query.brand), next_cursor: null });
+    }
+    return this.http.get<Page<TyreProduct>>(`${this.apiUrl}/tyres`, { ...this.getOptions(false), params: this.toParams({ limit: 24, ...query }) });
+  }
+
+  search(q: string, kind?: 'car' | 'tyre', cursor?: string): Observable<Page<SearchHit>> {
+    return this.http.get<Page<SearchHit>>(`${this.apiUrl}/search`, { ...this.getOptions(false), params: this.toParams({ q, kind, cursor, limit: 20 }) });
+  }
+
+  // Uploaded images are stored as "img:<hash>" and served as resized WebP; anything else is a plain URL.
+  imageSrc(image: string, width: number): string {
+    if (!image?.startsWith('img:')) return image;
+    return `${this.apiUrl}/images/${image.slice(4)}/${width}.webp`;
+  }
+
+  uploadImage(file: File): Observable<ImageUpload> {
+    const form = new FormData();
+    form.append('file', file);
+    return this.http.post<ImageUpload>(`${this.apiUrl}/images`, form, this.getOptions(true));
+  }
+
   // --- PUBLIC CRUD METHODS (Mocked in Demo Mode) ---
   addService(service: Omit<ServiceItem, 'id'>) {
     if (this.isDemoMode()) {
@@ -347,11 +584,23 @@ export class DataService {
     );
   }
 
+  // Updates are PATCHes: only the fields that differ from the loaded record
+  // are sent, and a field cleared in the form goes as an explicit null.
+  private changedFields<T extends { id: number }>(current: T | undefined, data: Partial<T>): Partial<T> {
+    const changes: Record<string, unknown> = {};
+    for (const [key, value] of Object.entries(data)) {
+      if (key === 'id') continue;
+      const next = value === undefined ? null : value;
+      const prev = current ? (current as any)[key] ?? null : undefined;
+      if (JSON.stringify(prev) !== JSON.stringify(next)) changes[key] = next;
+    }
+    return changes as Partial<T>;
+  }
+
   updateService(id: number, data: Partial<ServiceItem>) {
     if (this.isDemoMode()) return of(data as ServiceItem);
-    const current = this.services().find(s => s.id === id);
-    const payload = { ...current, ...data };
-    return this.http.put<ServiceItem>(`${this.apiUrl}/services/${id}`, payload, this.getOptions(true)).pipe(
+    const changes = this.changedFields(this.services().find(i => i.id === id), data);
+    return this.http.patch<ServiceItem>(`${this.apiUrl}/services/${id}`, changes, this.getOptions(true)).pipe(
       tap(updated => this.services.update(s => s.map(i => i.id === id ? updated : i)))
     );
   }
@@ -375,9 +624,8 @@ export class DataService {
 
   updateCar(id: number, car: Partial<Car>) {
     if (this.isDemoMode()) return of(car as Car);
-    const current = this.inventory().find(c => c.id === id);
-    const payload = { ...current, ...car };
-    return this.http.put<Car>(`${this.apiUrl}/cars/${id}`, payload, this.getOptions(true)).pipe(
+    const changes = this.changedFields(this.inventory().find(c => c.id === id), car);
+    return this.http.patch<Car>(`${this.apiUrl}/cars/${id}`, changes, this.getOptions(true)).pipe(
       tap(updated => this.inventory.update(cars => cars.map(c => c.id === id ? updated : c)))
     );
   }
@@ -397,6 +645,11 @@ export class DataService {
     return this.http.post<Booking>(`${this.apiUrl}/bookings`, { ...booking, status: 'Pending' }, this.getOptions(false));
   }
 
+  getBookingAvailability(from: string, to: string, service?: string): Observable<BookingAvailability> {
+    const params = this.toParams({ from, to, service });
+    return this.http.get<BookingAvailability>(`${this.apiUrl}/bookings/availability`, { ...this.getOptions(false), params });
+  }
+
   updateBookingStatus(id: number, status: Booking['status']) {
     if (this.isDemoMode()) return of(true);
     return this.http.put(`${this.apiUrl}/bookings/${id}/status`, { status }, this.getOptions(true)).pipe(
@@ -415,9 +668,8 @@ export class DataService {
 
   updateTyreProduct(id: number, data: Partial<TyreProduct>) {
     if (this.isDemoMode()) return of(data as TyreProduct);
-    const current = this.tyreInventory().find(t => t.id === id);
-    const payload = { ...current, ...data };
-    return this.http.put<TyreProduct>(`${this.apiUrl}/tyres/${id}`, payload, this.getOptions(true)).pipe(
+    const changes = this.changedFields(this.tyreInventory().find(t => t.id === id), data);
+    return this.http.patch<TyreProduct>(`${this.apiUrl}/tyres/${id}`, changes, this.getOptions(true)).pipe(
       tap(updated => this.tyreInventory.update(t => t.map(i => i.id === id ? updated : i)))
     );
   }
@@ -448,6 +700,19 @@ export class DataService {
     });
   }
 
+  // Apply many stock deltas (e.g. a stock-take) in one request and one transaction
+  updateTyreStockBatch(adjustments: { id: number; delta: number }[]) {
+    if (this.isDemoMode()) {
+      adjustments.forEach(a => this.updateTyreStock(a.id, a.delta));
+      return of(true);
+    }
+    return this.http.post<{ status: string; quantities: Record<string, number> }>(`${this.apiUrl}/tyres/stock/batch`, { adjustments }, this.getOptions(true)).pipe(
+      tap(res => this.tyreInventory.update(tyres => tyres.map(t =>
+        res.quantities[t.id] !== undefined ? { ...t, quantity: res.quantities[t.id] } : t
+      )))
+    );
+  }
+
   searchTyres(vehicleQuery: string): TyreProduct[] {
     const query = vehicleQuery.toLowerCase();
     if (query.length < 2) return [];